@@ -0,0 +1,192 @@
+import sys
+import os
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+import asyncio
+from typing import List, Optional
+from unittest import mock
+from xoa_cqtm import cmisfuncs, utils
+from xoa_cqtm.cmisfuncs import CMISField, CMISPageCache, CMISTransaction, plan_cmis_reads, read_cmis_memory
+from xoa_cqtm.enums import ConfigStatus, Cursor
+from xoa_cqtm.utils import PortLeaseManager
+
+class FakeToken:
+    def __init__(self, port: "FakePort", page: int, reg_addr: int, size: int, value: Optional[str] = None):
+        self.port = port
+        self.page = page
+        self.reg_addr = reg_addr
+        self.size = size
+        self.value = value
+
+    def response(self):
+        memory = self.port.memory[self.page]
+        if self.value is not None:
+            memory[self.reg_addr:self.reg_addr+self.size] = bytes.fromhex(str(self.value))
+            if (self.page, self.reg_addr) == (0x01, 143):
+                self.port.on_trigger()
+            return mock.Mock()
+        self.port.reads += 1
+        if (self.page, self.reg_addr) == (0x11, 202) and self.port.config_status_script:
+            memory[202:206] = bytes([self.port.config_status_script.pop(0)] * 4)
+        return mock.Mock(value=memory[self.reg_addr:self.reg_addr+self.size].hex().upper())
+
+    def __await__(self):
+        async def _get():
+            return self.response()
+        return _get().__await__()
+
+class FakePort:
+    def __init__(self, module_id: int, port_id: int, vendor: bytes):
+        self.kind = mock.Mock(module_id=module_id, port_id=port_id)
+        self.memory = {0x00: bytearray(256), 0x01: bytearray(256), 0x10: bytearray(256), 0x11: bytearray(256)}
+        self.memory[0x00][129:129+len(vendor)] = vendor
+        self.reads = 0
+        # ConfigStatus byte (2 lanes) of the reads after the trigger
+        self.config_status_script: List[int] = []
+        self.trigger_script: List[int] = []
+        # the module copies Staged Control Set 0 to the Active Control Set on the trigger
+        self.apply_on_trigger = False
+        self.transceiver = mock.Mock()
+        self.transceiver.access_rw_seq = lambda page_address, register_address, byte_count: mock.Mock(
+            get=lambda: FakeToken(self, page_address, register_address, byte_count),
+            set=lambda value: FakeToken(self, page_address, register_address, byte_count, value))
+
+    def on_trigger(self):
+        self.config_status_script = list(self.trigger_script)
+        if self.apply_on_trigger:
+            self.memory[0x11][221:233] = self.memory[0x10][162:174]
+
+async def fake_apply(*tokens, **kwargs):
+    return [token.response() for token in tokens]
+
+def test_cache_is_served_from_memory_until_invalidated():
+    port = FakePort(3, 0, b"VENDOR A")
+    cache = CMISPageCache()
+
+    async def _run():
+        with mock.patch.object(cmisfuncs.utils, "apply", fake_apply):
+            assert bytes.fromhex(await read_cmis_memory(port, 0x00, 129, 8, cache)) == b"VENDOR A"
+            loads = port.reads
+            # the transceiver is replugged, the cache still has the old vendor
+            port.memory[0x00][129:137] = b"VENDOR B"
+            assert bytes.fromhex(await read_cmis_memory(port, 0x00, 129, 8, cache)) == b"VENDOR A"
+            assert port.reads == loads
+            cache.invalidate([port])
+            assert bytes.fromhex(await read_cmis_memory(port, 0x00, 129, 8, cache)) == b"VENDOR B"
+            # without a cache, the transceiver is always read
+            port.memory[0x00][129:137] = b"VENDOR C"
+            assert bytes.fromhex(await read_cmis_memory(port, 0x00, 129, 8)) == b"VENDOR C"
+    asyncio.run(_run())
+
+def test_each_session_has_its_own_cache():
+    lease_a = PortLeaseManager(mock.Mock())
+    lease_b = PortLeaseManager(mock.Mock())
+    port_a = FakePort(3, 0, b"VENDOR A")
+    port_b = FakePort(3, 0, b"VENDOR B")
+
+    async def _run():
+        with mock.patch.object(cmisfuncs.utils, "apply", fake_apply):
+            # same module and port index on two testers
+            assert bytes.fromhex(await read_cmis_memory(port_a, 0x00, 129, 8, lease_a.cmis_cache)) == b"VENDOR A"
+            assert bytes.fromhex(await read_cmis_memory(port_b, 0x00, 129, 8, lease_b.cmis_cache)) == b"VENDOR B"
+            # the cache of a session survives releasing the ports, e.g. before a media change
+            await lease_a.release_all()
+            assert list(lease_a.cmis_cache.database) == [(3, 0)]
+            assert list(lease_b.cmis_cache.database) == [(3, 0)]
+    asyncio.run(_run())
+
+def test_media_change_invalidates_the_module():
+    cache = CMISPageCache()
+    port_list = [FakePort(3, 0, b"VENDOR A"), FakePort(3, 1, b"VENDOR A"), FakePort(6, 0, b"VENDOR B")]
+
+    async def _run():
+        with mock.patch.object(cmisfuncs.utils, "apply", fake_apply), \
+             mock.patch.object(utils.mgmt, "set_module_media_config", mock.AsyncMock()), \
+             mock.patch.object(utils.mgmt, "set_module_port_config", mock.AsyncMock()):
+            for port in port_list:
+                await read_cmis_memory(port, 0x00, 129, 8, cache)
+            await utils.change_module_media(mock.Mock(), [3], mock.Mock(), "1x800G", "test", cache)
+    asyncio.run(_run())
+    assert list(cache.database) == [(6, 0)]
+
+def _provision(port: FakePort, timeout: float) -> CMISTransaction:
+    async def _run():
+        with mock.patch.object(cmisfuncs.utils, "apply", fake_apply):
+            txn = CMISTransaction(port, "test")
+            txn.output_eq_write_all(3, Cursor.Precursor)
+            await txn.commit()
+            await txn.wait_config_status(timeout=timeout)
+            return txn
+    return asyncio.run(_run())
+
+def test_stale_config_success_is_not_accepted():
+    port = FakePort(3, 0, b"")
+    # ConfigSuccess left over from the previous provisioning, and the module never updates it
+    port.memory[0x11][202:206] = bytes([0x11] * 4)
+    txn = _provision(port, timeout=0.3)
+    assert txn.config_status_before == [ConfigStatus.ConfigSuccess] * 8
+    assert not txn.config_completed
+
+def test_config_success_after_in_progress_is_accepted():
+    port = FakePort(3, 0, b"")
+    port.memory[0x11][202:206] = bytes([0x11] * 4)
+    port.trigger_script = [0xCC, 0xCC, 0x11]
+    txn = _provision(port, timeout=5.0)
+    assert txn.config_completed
+    # the staged write was sent with the trigger
+    field = cmisfuncs.CMIS_FIELDS["rx_output_eq_pre"]
+    assert port.memory[field.page][field.offset:field.offset+field.width] == bytes([0x33] * field.width)
+
+def test_config_status_change_is_accepted():
+    port = FakePort(3, 0, b"")
+    port.memory[0x11][202:206] = bytes([0x11] * 4)
+    port.trigger_script = [0x55]
+    txn = _provision(port, timeout=5.0)
+    assert txn.config_completed
+
+def test_config_applied_before_the_first_poll_is_accepted():
+    port = FakePort(3, 0, b"")
+    # ConfigSuccess left over from the previous provisioning, and the module applies the new settings before the first poll
+    port.memory[0x11][202:206] = bytes([0x11] * 4)
+    port.apply_on_trigger = True
+    txn = _provision(port, timeout=5.0)
+    assert txn.config_completed
+    assert port.memory[0x11][221:225] == bytes([0x33] * 4)
+
+def test_config_success_with_other_active_settings_is_not_accepted():
+    port = FakePort(3, 0, b"")
+    port.memory[0x11][202:206] = bytes([0x11] * 4)
+    # the Active Control Set holds the settings of the previous provisioning
+    port.memory[0x11][221:225] = bytes([0x22] * 4)
+    txn = _provision(port, timeout=0.3)
+    assert not txn.config_completed
+
+def test_plan_cmis_reads_bridges_small_gaps():
+    # vendor name 129-144 and vendor PN 148-163, 3 bytes apart
+    fields = [CMISField(0x00, 148, 16), CMISField(0x00, 129, 16)]
+    assert plan_cmis_reads(fields) == [(0x00, 129, 35)]
+    # overlapping fields
+    assert plan_cmis_reads([CMISField(0x10, 162, 4), CMISField(0x10, 164, 4)]) == [(0x10, 162, 6)]
+    # the largest bridged gap, and one byte more
+    assert plan_cmis_reads([CMISField(0x00, 130), CMISField(0x00, 131 + cmisfuncs.CMIS_MAX_GAP)]) == [(0x00, 130, 18)]
+    assert plan_cmis_reads([CMISField(0x00, 130), CMISField(0x00, 132 + cmisfuncs.CMIS_MAX_GAP)]) == [(0x00, 130, 1), (0x00, 148, 1)]
+
+def test_plan_cmis_reads_never_reads_latched_flags_as_a_gap():
+    # lower memory flags 8-13 between module state and temperature
+    assert plan_cmis_reads([CMISField(0x00, 3), CMISField(0x00, 14, 2)]) == [(0x00, 3, 1), (0x00, 14, 2)]
+    # page 11h flags 134-153, a gap touching only the last flag byte
+    assert plan_cmis_reads([CMISField(0x11, 130, 4), CMISField(0x11, 140)]) == [(0x11, 130, 4), (0x11, 140, 1)]
+    assert plan_cmis_reads([CMISField(0x11, 150, 3), CMISField(0x11, 154, 2)]) == [(0x11, 150, 3), (0x11, 154, 2)]
+    # a flag field itself is read, and a gap right after the flags is bridged
+    assert plan_cmis_reads([CMISField(0x11, 136), CMISField(0x11, 154, 2), CMISField(0x11, 160, 2)]) == [(0x11, 136, 1), (0x11, 154, 8)]
+
+def test_plan_cmis_reads_never_crosses_memory_or_pages():
+    # lower and upper memory are never read together
+    assert plan_cmis_reads([CMISField(0x00, 124, 4), CMISField(0x00, 128, 4)]) == [(0x00, 124, 4), (0x00, 128, 4)]
+    # nor two pages, even at adjacent or the same addresses
+    assert plan_cmis_reads([CMISField(0x10, 250, 6), CMISField(0x11, 128, 2)]) == [(0x10, 250, 6), (0x11, 128, 2)]
+    assert plan_cmis_reads([CMISField(0x11, 202, 4), CMISField(0x10, 202, 4)]) == [(0x10, 202, 4), (0x11, 202, 4)]
+    # the lower memory fields of a page are read from page 00h
+    assert plan_cmis_reads([CMISField(0x11, 2), CMISField(0x00, 1)]) == [(0x00, 1, 2)]
@@ -0,0 +1,55 @@
+import sys
+import os
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+import asyncio
+import logging
+import pytest
+from unittest import mock
+from xoa_driver import enums
+from xoa_cqtm import utils
+from xoa_cqtm.readiness import SettleTimeTracker
+from xoa_cqtm.utils import PortLeaseManager, PortOperationError, wait_ports_reservation
+
+def _port(module_id: int, port_id: int, statuses: list):
+    # each reservation query returns the next status, then the last one
+    port = mock.Mock()
+    port.kind = mock.Mock(module_id=module_id, port_id=port_id)
+    def _get():
+        status = statuses.pop(0) if len(statuses) > 1 else statuses[0]
+        return mock.Mock(status=status)
+    port.reservation.get = _get
+    return port
+
+async def fake_apply(*resps, **kwargs):
+    return list(resps)
+
+def test_reservation_timeout_raises_with_the_ports_not_reserved(caplog):
+    port_list = [
+        _port(3, 0, [enums.ReservedStatus.RELEASED, enums.ReservedStatus.RESERVED_BY_YOU]),
+        _port(6, 0, [enums.ReservedStatus.RESERVED_BY_OTHER]),
+    ]
+    async def _run():
+        with mock.patch.object(utils.utils, "apply", fake_apply):
+            await wait_ports_reservation(port_list, enums.ReservedStatus.RESERVED_BY_YOU, timeout=0.2, logger_name="cqtm_test")
+    with caplog.at_level(logging.WARNING, logger="cqtm_test"):
+        with pytest.raises(PortOperationError) as excinfo:
+            asyncio.run(_run())
+    assert list(excinfo.value.errors) == ["Port 6/0"]
+    assert "RESERVED_BY_OTHER" in str(excinfo.value)
+    # the timeout is logged to the logger of the test
+    assert [record.name for record in caplog.records] == ["cqtm_test"]
+
+def test_settle_times_belong_to_the_session():
+    lease_a = PortLeaseManager(mock.Mock(), "cqtm_test")
+    lease_b = PortLeaseManager(mock.Mock(), "cqtm_test")
+    port_list = [_port(3, 0, [enums.ReservedStatus.RELEASED, enums.ReservedStatus.RESERVED_BY_YOU])]
+    async def _run():
+        with mock.patch.object(utils.utils, "apply", fake_apply):
+            await wait_ports_reservation(port_list, enums.ReservedStatus.RESERVED_BY_YOU, logger_name=lease_a.logger_name, tracker=lease_a.settle_times)
+    asyncio.run(_run())
+    assert isinstance(lease_a.settle_times, SettleTimeTracker)
+    assert lease_a.settle_times.estimate("port_reservation_reserved_by_you") is not None
+    assert lease_b.settle_times.estimate("port_reservation_reserved_by_you") is None
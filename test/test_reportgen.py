@@ -0,0 +1,88 @@
+import sys
+import os
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+import csv
+import time
+from array import array
+from unittest import mock
+from xoa_cqtm.reportgen import PRBSReportGenerator, FECReportGenerator, report_journal_filename
+
+LANES = ("Port 6/0 - SerDes 0", "Port 6/0 - SerDes 1")
+
+def _record_prbs(prbs: PRBSReportGenerator) -> None:
+    prbs.datetime = "2024-01-01 00:00:00"
+    with mock.patch("time.time", side_effect=[1000.0 + i for i in range(100)]):
+        for i in range(10):
+            for lane in LANES:
+                # no bit received on the first sample, e.g. PRBS not locked yet
+                prbs.record_data(lane, "No Lock" if i == 0 else "Locked", 1000*i, i % 2)
+    prbs.record_verdict(LANES[0], "PASS")
+
+def test_prbs_samples_are_stored_in_typed_arrays():
+    prbs = PRBSReportGenerator()
+    _record_prbs(prbs)
+    samples = prbs.database[LANES[0]]
+    assert isinstance(samples.timestamps, array) and samples.timestamps.typecode == "d"
+    assert isinstance(samples.bits, array) and samples.bits.typecode == "Q"
+    assert isinstance(samples.errors, array) and samples.errors.typecode == "Q"
+    assert list(samples.timestamps) == [1000.0 + 2*i for i in range(10)]
+    assert list(samples.bits) == [1000*i for i in range(10)]
+    assert list(samples.errors) == [i % 2 for i in range(10)]
+    assert [prbs.lock_names[x] for x in samples.lock] == ["No Lock"] + ["Locked"]*9
+    # the first sample has no bits, so it is not part of the min/max
+    assert samples.min_ber == 1/9000
+    assert samples.max_ber == 4.6/2000
+    assert samples.final_ber == 1/9000
+
+def test_prbs_report_without_bits(tmp_path):
+    filename = os.path.join(str(tmp_path), "report.csv")
+    prbs = PRBSReportGenerator()
+    _record_prbs(prbs)
+    prbs.generate_report(filename)
+    with open(filename) as f:
+        rows = list(csv.reader(f))
+    lane = rows.index([LANES[0]])
+    assert rows[lane+1] == ["Time", "PRBS Lock", "PRBS Bits", "PRBS Errors", "PRBS BER"]
+    assert rows[lane+2][1:] == ["No Lock", "0", "0", "N/A"]
+    assert rows[lane+3][1:] == ["Locked", "1000", "1", "1.00e-03"]
+    assert rows[lane+12] == ["Min BER:", "1.11e-04", "Max BER:", "2.30e-03", "Final BER:", "1.11e-04"]
+    assert rows[lane+13] == ["Verdict:", "PASS"]
+
+def _generate(path: str, journal: bool) -> str:
+    filename = os.path.join(path, f"report_{journal}.csv")
+    prbs = PRBSReportGenerator(journal_filename=report_journal_filename(filename, "prbs") if journal else None)
+    fec = FECReportGenerator(journal_filename=report_journal_filename(filename, "fec") if journal else None)
+    fec.datetime = "2024-01-01 00:00:00"
+    if journal:
+        prbs.journal.buffer_size = 3
+    _record_prbs(prbs)
+    # the FEC rows are timestamped when recorded
+    with mock.patch("time.localtime", return_value=time.gmtime(1000)):
+        for i in range(10):
+            for lane in LANES:
+                fec.record_data(lane, "1.00e-05", "0.0")
+    prbs.generate_report(filename)
+    fec.generate_report(filename)
+    return filename
+
+def test_journal_report_matches_memory_report(tmp_path):
+    memory_report = _generate(str(tmp_path), journal=False)
+    journal_report = _generate(str(tmp_path), journal=True)
+    with open(memory_report) as f1, open(journal_report) as f2:
+        assert f1.read() == f2.read()
+    # the journals are removed once the report is generated
+    assert sorted(os.listdir(tmp_path)) == ["report_False.csv", "report_True.csv"]
+
+def test_journal_keeps_rows_of_an_interrupted_test(tmp_path):
+    filename = os.path.join(str(tmp_path), "report.csv")
+    fec = FECReportGenerator(journal_filename=report_journal_filename(filename, "fec"))
+    for i in range(5):
+        fec.record_data("Port 6/0", f"{i}", "0.0")
+    fec.journal.checkpoint()
+    # the test is interrupted before generate_report
+    with open(fec.journal.filename) as f:
+        assert len(f.readlines()) == 5
+    assert not os.path.exists(filename)
@@ -0,0 +1,62 @@
+import sys
+import os
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+import asyncio
+from typing import Dict, List, Tuple
+from unittest import mock
+from xoa_cqtm import sampler
+from xoa_cqtm.sampler import DeadlineSampler
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        self.now += delay
+
+def _run(interval: float, duration: float, slow_ticks: Dict[int, float]) -> Tuple[DeadlineSampler, List[Tuple[int, float]]]:
+    """Run the sampler on a fake clock. The iteration of tick n takes slow_ticks[n] seconds, the others take no time. Return the sampler and the (tick, time since start) of each sample.
+    """
+    clock = FakeClock()
+    samples = []
+
+    async def _sample(deadline_sampler: DeadlineSampler):
+        async for tick in deadline_sampler.ticks():
+            samples.append((tick, clock.now - deadline_sampler.start_time))
+            clock.now += slow_ticks.get(tick, 0.0)
+
+    with mock.patch.object(sampler.time, "monotonic", clock.monotonic), mock.patch.object(sampler.asyncio, "sleep", clock.sleep):
+        deadline_sampler = DeadlineSampler(interval=interval, duration=duration, logger_name="test")
+        asyncio.run(_sample(deadline_sampler))
+    return deadline_sampler, samples
+
+def test_ticks_on_deadlines():
+    deadline_sampler, samples = _run(0.5, 5, {})
+    assert deadline_sampler.tick_count == 10
+    assert samples == [(tick, tick*0.5) for tick in range(1, 11)]
+    assert deadline_sampler.missed_ticks == 0
+    assert deadline_sampler.max_lateness == 0.0
+
+def test_missed_ticks_are_skipped_not_bunched():
+    # the iteration of tick 2 takes 3.5 intervals
+    deadline_sampler, samples = _run(1.0, 10, {2: 3.5})
+    # ticks 3 and 4 are skipped, tick 5 is sampled late, then the sampling is back on the deadlines
+    assert samples == [(1, 1.0), (2, 2.0), (5, 5.5), (6, 6.0), (7, 7.0), (8, 8.0), (9, 9.0), (10, 10.0)]
+    assert deadline_sampler.tick_count == 10
+    assert deadline_sampler.missed_ticks == 2
+    assert deadline_sampler.sampled_ticks + deadline_sampler.missed_ticks == deadline_sampler.tick_count
+    assert deadline_sampler.max_lateness == 0.5
+
+def test_last_tick_is_never_skipped():
+    # the iteration of tick 8 ends after the end of the test
+    deadline_sampler, samples = _run(1.0, 10, {8: 5.0})
+    assert samples[-2:] == [(8, 8.0), (10, 13.0)]
+    assert deadline_sampler.tick_count == 10
+    assert deadline_sampler.missed_ticks == 1
+    assert deadline_sampler.sampled_ticks == 9
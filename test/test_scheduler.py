@@ -0,0 +1,98 @@
+import sys
+import os
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+import asyncio
+import pytest
+from xoa_cqtm.scheduler import StepScheduler, TestStep as Step
+from xoa_cqtm.enums import TestResource as Resource
+
+async def _noop():
+    pass
+
+def test_conflicts_with():
+    write_ports = Step("write_ports", _noop, writes=[Resource.Ports])
+    read_ports = Step("read_ports", _noop, reads=[Resource.Ports])
+    read_ports_2 = Step("read_ports_2", _noop, reads=[Resource.Ports])
+    write_line = Step("write_line", _noop, reads=[Resource.Media], writes=[Resource.Line])
+
+    # read-after-write and write-after-read
+    assert read_ports.conflicts_with(write_ports)
+    assert write_ports.conflicts_with(read_ports)
+    # write-after-write
+    assert write_ports.conflicts_with(Step("write_ports_2", _noop, writes=[Resource.Ports]))
+    # read-after-read and disjoint resources
+    assert not read_ports.conflicts_with(read_ports_2)
+    assert not write_line.conflicts_with(write_ports)
+    assert not write_line.conflicts_with(read_ports)
+
+def test_dependencies_follow_program_order():
+    scheduler = StepScheduler("test")
+    media = scheduler.add_step("media", _noop, writes=[Resource.Media, Resource.Ports])
+    read_a = scheduler.add_step("read_a", _noop, reads=[Resource.Media, Resource.Ports])
+    read_b = scheduler.add_step("read_b", _noop, reads=[Resource.Media, Resource.Ports])
+    reset = scheduler.add_step("reset", _noop, reads=[Resource.Media], writes=[Resource.Ports])
+
+    assert read_a.depends_on == [media]
+    assert read_b.depends_on == [media]
+    assert reset.depends_on == [media, read_a, read_b]
+
+def test_duplicated_step_name():
+    scheduler = StepScheduler("test")
+    scheduler.add_step("step", _noop)
+    with pytest.raises(AssertionError):
+        scheduler.add_step("step", _noop)
+
+def test_independent_steps_run_concurrently():
+    events = []
+
+    def make_step(name: str, delay: float):
+        async def _step():
+            events.append(f"start {name}")
+            await asyncio.sleep(delay)
+            events.append(f"end {name}")
+        return _step
+
+    scheduler = StepScheduler("test")
+    scheduler.add_step("a", make_step("a", 0.05), reads=[Resource.Ports])
+    scheduler.add_step("b", make_step("b", 0.01), reads=[Resource.Ports])
+    scheduler.add_step("c", make_step("c", 0.01), writes=[Resource.Ports])
+    asyncio.run(scheduler.run())
+
+    # a and b only read, so they overlap. c writes, so it waits for both.
+    assert events[:2] == ["start a", "start b"]
+    assert events[2:] == ["end b", "end a", "start c", "end c"]
+
+def test_failing_step_cancels_the_others():
+    cancelled = []
+    started = []
+
+    async def _slow():
+        started.append("slow")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+
+    async def _fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("step failed")
+
+    async def _after():
+        started.append("after")
+
+    scheduler = StepScheduler("test")
+    scheduler.add_step("slow", _slow, reads=[Resource.Line])
+    scheduler.add_step("fail", _fail, reads=[Resource.Ports])
+    scheduler.add_step("after", _after, writes=[Resource.Ports])
+
+    async def _run():
+        with pytest.raises(RuntimeError, match="step failed"):
+            await asyncio.wait_for(scheduler.run(), timeout=5)
+
+    asyncio.run(_run())
+    assert cancelled == ["slow"]
+    assert "after" not in started
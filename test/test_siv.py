@@ -0,0 +1,52 @@
+import sys
+import os
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+import numpy as np
+from xoa_cqtm.siv import SIVHistogram, SIVSampleBuffer, SIV_LEVEL_COUNT, SIV_SAMPLE_COUNT, compute_pam4_metrics
+
+def _reference_counts(samples: np.ndarray) -> np.ndarray:
+    in_range = samples[(samples >= -64) & (samples <= 63)]
+    counts, _ = np.histogram(in_range, bins=SIVHistogram.bin_edges())
+    return counts
+
+def test_histogram_follows_ring_buffer():
+    rng = np.random.default_rng(0)
+    buffer = SIVSampleBuffer(depth=3)
+    captures = []
+    for i in range(7):
+        levels = np.full(SIV_LEVEL_COUNT, i, dtype=np.int16)
+        samples = rng.integers(-70, 70, SIV_SAMPLE_COUNT).astype(np.int16)
+        captures.append(samples)
+        buffer.append(levels, samples)
+
+        # the buffer keeps the last 3 captures, and the histogram only counts them
+        kept = np.concatenate(captures[-3:])
+        assert buffer.size == min(i + 1, 3)
+        assert np.array_equal(buffer.ordered_samples(), kept)
+        assert np.array_equal(buffer.histogram.counts, _reference_counts(kept))
+        assert buffer.histogram.out_of_range == np.count_nonzero((kept < -64) | (kept > 63))
+        assert buffer.latest_levels()[0] == i
+
+def test_pam4_metrics():
+    # 4 evenly spaced levels at -30, -10, 10, 30, slicers at -20, 0, 20
+    samples = np.repeat(np.array([-30, -10, 10, 30], dtype=np.int16), 100)
+    samples[::2] += 1
+    levels = np.array([10, 20, 30, -30, -20, -10], dtype=np.int16)
+    metrics = compute_pam4_metrics(samples, levels)
+    assert np.allclose(metrics["mean"], [-29.5, -9.5, 10.5, 30.5])
+    assert np.isclose(metrics["rlm"], 1.0)
+    assert all(snr is not None for snr in metrics["snr"])
+    assert np.allclose(metrics["margin"], [9.5, 9.5, 9.5])
+
+def test_pam4_metrics_invalid_slicers():
+    samples = np.arange(-40, 40, dtype=np.int16)
+    # slicers not monotonic, and decreasing
+    for levels in ([0, -5, 0, 0, -3, 0], [0, -5, 0, 0, 5, 0], [0, 0, 0, 0, 0, 0]):
+        metrics = compute_pam4_metrics(samples, np.array(levels, dtype=np.int16))
+        assert metrics["mean"] == [None]*4
+        assert metrics["rlm"] is None
+        assert metrics["snr"] == [None]*3
+        assert metrics["margin"] == [None]*3
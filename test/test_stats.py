@@ -0,0 +1,40 @@
+import sys
+import os
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+import math
+import pytest
+from xoa_cqtm.utils import poisson_mean_bound, ber_target_verdict
+
+def test_garwood_bounds():
+    # chi2.ppf(0.99, 2)/2, chi2.ppf(0.99, 4)/2 and chi2.ppf(0.01, 2)/2
+    assert poisson_mean_bound(0, 0.99, upper=True) == pytest.approx(4.605, abs=1e-3)
+    assert poisson_mean_bound(0, 0.99, upper=False) == 0.0
+    assert poisson_mean_bound(1, 0.99, upper=True) == pytest.approx(6.638, abs=1e-3)
+    assert poisson_mean_bound(1, 0.99, upper=False) == pytest.approx(0.01005, abs=1e-5)
+    # 95% confidence
+    assert poisson_mean_bound(0, 0.95, upper=True) == pytest.approx(-math.log(0.05))
+    assert poisson_mean_bound(10, 0.95, upper=True) == pytest.approx(16.962, abs=1e-3)
+
+@pytest.mark.parametrize("upper", [True, False])
+def test_no_jump_at_the_approximation(upper: bool):
+    # counts up to 100 use the exact bound, counts above 100 use the Wilson-Hilferty approximation
+    bounds = [poisson_mean_bound(count, 0.99, upper) for count in range(98, 104)]
+    steps = [b - a for a, b in zip(bounds, bounds[1:])]
+    assert all(step > 0 for step in steps)
+    assert max(steps) - min(steps) < 0.05
+
+def test_ber_target_verdict():
+    # no error in 1e12 bits: the upper bound is 4.6e-12
+    assert ber_target_verdict(10**12, 0, 1e-11, 0.99) == "pass"
+    assert ber_target_verdict(10**12, 0, 1e-12, 0.99) is None
+    # 100 errors in 1e9 bits, far above the target
+    assert ber_target_verdict(10**9, 100, 1e-9, 0.99) == "fail"
+    # 1 error in 1e9 bits: the BER is between 1.0e-11 and 6.6e-9
+    assert ber_target_verdict(10**9, 1, 1e-9, 0.99) is None
+    assert ber_target_verdict(10**9, 1, 1e-8, 0.99) == "pass"
+    assert ber_target_verdict(10**9, 1, 1e-12, 0.99) == "fail"
+    # no bit received yet
+    assert ber_target_verdict(0, 0, 1e-12, 0.99) is None
@@ -0,0 +1,52 @@
+import sys
+import os
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+import math
+from decimal import Decimal
+from xoa_cqtm.utils import ThroughputSearch
+
+def _search(start_rate: float, end_rate: float, resolution: float, knee: float) -> ThroughputSearch:
+    # the rates are built like latency_frame_loss_test does, and a trial has no loss up to the knee
+    search = ThroughputSearch(Decimal(start_rate), Decimal(end_rate), Decimal(resolution))
+    while not search.done:
+        rate = search.next_rate
+        assert Decimal(start_rate) <= rate <= Decimal(end_rate)
+        search.update(rate <= Decimal(knee), {"traffic_rate": rate})
+        assert search.trials < 100
+    return search
+
+def _max_bisections(start_rate: float, end_rate: float, resolution: float) -> int:
+    return math.ceil(math.log2((end_rate - start_rate)/resolution))
+
+def test_knee_at_end_rate():
+    search = _search(0.1, 1.0, 0.01, knee=1.0)
+    assert search.best_result["traffic_rate"] == Decimal(1.0)
+    assert search.trials == 1
+
+def test_knee_in_mid_range():
+    for knee in (0.537, 0.25, 0.99):
+        search = _search(0.1, 1.0, 0.01, knee=knee)
+        rate = search.best_result["traffic_rate"]
+        assert rate <= Decimal(knee)
+        assert Decimal(knee) - rate <= Decimal(0.01)
+        # the first trial at the end rate, then one trial per bisection
+        assert search.upper - search.lower <= Decimal(0.01)
+        assert search.trials <= 1 + _max_bisections(0.1, 1.0, 0.01)
+
+def test_knee_below_start_rate():
+    search = _search(0.1, 1.0, 0.01, knee=0.05)
+    assert search.best_result is None
+    # the start rate is tried once, after the bisections
+    assert search.next_rate == Decimal(0.1)
+    assert search.trials <= 2 + _max_bisections(0.1, 1.0, 0.01)
+
+def test_start_rate_equals_end_rate():
+    search = _search(0.5, 0.5, 0.01, knee=0.6)
+    assert search.best_result["traffic_rate"] == Decimal(0.5)
+    assert search.trials == 1
+    search = _search(0.5, 0.5, 0.01, knee=0.4)
+    assert search.best_result is None
+    assert search.trials == 1
@@ -4,29 +4,344 @@
 
 import asyncio
 from xoa_driver import  ports
+from xoa_driver import utils
 from xoa_driver.misc import Hex
 from .enums import *
+from .readiness import wait_until
 import logging
-from typing import List, Any
+from typing import List, Any, Dict, Tuple, Optional, Callable, Iterable
+
+# *************************************************************************************
+# func: wait_register_value
+# description: Read back a register until it holds the written value
+# *************************************************************************************
+async def wait_register_value(port: ports.Z800FreyaPort, page: int, reg_addr: int, size: int, value: str, logger_name: str) -> bool:
+    """Read back a register until it holds the written value
+    """
+    async def _probe() -> bool:
+        resp = await port.transceiver.access_rw_seq(page_address=page, register_address=reg_addr, byte_count=size).get()
+        return str(resp.value).upper() == value.upper()
+    return await wait_until("cmis_register_write", _probe, timeout=5.0, logger_name=logger_name)
+
+# *************************************************************************************
+# class: CMISPageCache
+# description: Per-port cache of the static CMIS memory of the transceiver
+# *************************************************************************************
+class CMISPageCache:
+    """Per-port cache of the static CMIS memory of the transceiver, i.e. lower memory bytes 0-2 (identifier, revision, characteristics) and the upper memory of page 00h (bytes 128-255, vendor info and media info). The first read of a port fetches all of it in one command group, and the following reads are served from memory.
+
+    A cache belongs to one tester session (see ``PortLeaseManager.cmis_cache``). The cache of a port must be invalidated when the transceiver may have changed, e.g. when the port is reset, and the cache of a module when its transceivers are re-initialized, e.g. by a media change.
+    """
+    # (page, register address, byte count) of the static blocks
+    STATIC_BLOCKS: List[Tuple[int, int, int]] = [(0x00, 0, 3), (0x00, 128, 128)]
+
+    def __init__(self):
+        self.database: Dict[Tuple[int, int], Dict[Tuple[int, int], bytes]] = {}
+        self._locks: Dict[Tuple[int, int], asyncio.Lock] = {}
+
+    @staticmethod
+    def _port_key(port: ports.Z800FreyaPort) -> Tuple[int, int]:
+        return (port.kind.module_id, port.kind.port_id)
+
+    def covers(self, page: int, reg_addr: int, size: int) -> bool:
+        """Check if the memory is cached.
+        """
+        try:
+            self._find_block(page, reg_addr, size)
+        except ValueError:
+            return False
+        return True
+
+    def _find_block(self, page: int, reg_addr: int, size: int) -> Tuple[int, int, int]:
+        for block in self.STATIC_BLOCKS:
+            _page, _reg_addr, _size = block
+            if page == _page and _reg_addr <= reg_addr and reg_addr + size <= _reg_addr + _size:
+                return block
+        raise ValueError(f"Page {page:02X}h bytes {reg_addr}-{reg_addr+size-1} are not cached")
+
+    async def _load(self, port: ports.Z800FreyaPort) -> Dict[Tuple[int, int], bytes]:
+        key = self._port_key(port)
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        async with self._locks[key]:
+            if key not in self.database:
+                resps = await utils.apply(*[port.transceiver.access_rw_seq(page_address=_page, register_address=_reg_addr, byte_count=_size).get() for _page, _reg_addr, _size in self.STATIC_BLOCKS])
+                self.database[key] = {(_page, _reg_addr): bytes.fromhex(resp.value) for (_page, _reg_addr, _size), resp in zip(self.STATIC_BLOCKS, resps)}
+            return self.database[key]
+
+    async def read(self, port: ports.Z800FreyaPort, page: int, reg_addr: int, size: int) -> str:
+        """Read static CMIS memory of the transceiver.
+
+        :param port: port object
+        :type port: ports.Z800FreyaPort
+        :param page: page address
+        :type page: int
+        :param reg_addr: register address
+        :type reg_addr: int
+        :param size: byte count
+        :type size: int
+        :return: the value as hex string, same as ``access_rw_seq(...).get()``
+        :rtype: str
+        """
+        _page, _reg_addr, _size = self._find_block(page, reg_addr, size)
+        data = await self._load(port)
+        _offset = reg_addr - _reg_addr
+        return data[(_page, _reg_addr)][_offset:_offset+size].hex().upper()
+
+    def invalidate(self, port_obj_list: List[ports.Z800FreyaPort]) -> None:
+        """Drop the cached memory of the ports, so that the next read fetches it from the transceiver again.
+
+        :param port_obj_list: ports
+        :type port_obj_list: List[ports.Z800FreyaPort]
+        """
+        for port in port_obj_list:
+            self.database.pop(self._port_key(port), None)
+
+    def invalidate_module(self, module_id: int) -> None:
+        """Drop the cached memory of all ports of a module, e.g. after a media change, which re-initializes the transceivers and re-numbers the ports.
+
+        :param module_id: module index
+        :type module_id: int
+        """
+        for key in [key for key in self.database if key[0] == module_id]:
+            del self.database[key]
+
+    def clear(self) -> None:
+        """Drop the cached memory of all ports.
+        """
+        self.database.clear()
+
+# *************************************************************************************
+# func: read_cmis_memory
+# description: Read CMIS memory of the transceiver, from the cache if possible
+# *************************************************************************************
+async def read_cmis_memory(port: ports.Z800FreyaPort, page: int, reg_addr: int, size: int, cache: Optional[CMISPageCache] = None) -> str:
+    """Read CMIS memory of the transceiver. Static memory is served from the cache if one is given.
+
+    :param port: port object
+    :type port: ports.Z800FreyaPort
+    :param page: page address
+    :type page: int
+    :param reg_addr: register address
+    :type reg_addr: int
+    :param size: byte count
+    :type size: int
+    :param cache: CMIS page cache of the session, defaults to None
+    :type cache: Optional[CMISPageCache], optional
+    :return: the value as hex string, same as ``access_rw_seq(...).get()``
+    :rtype: str
+    """
+    if cache is not None and cache.covers(page, reg_addr, size):
+        return await cache.read(port, page, reg_addr, size)
+    resp = await port.transceiver.access_rw_seq(page_address=page, register_address=reg_addr, byte_count=size).get()
+    return resp.value
+
+# *************************************************************************************
+# class: CMISField
+# description: Location and decoder of a CMIS field
+# *************************************************************************************
+class CMISField:
+    """Location and decoder of a CMIS field. A field is ``width`` bytes at ``offset`` of ``page``, big-endian. If ``mask`` is given, the field is the bit-field ``(value >> shift) & mask``. The result is then passed to ``decoder``, if any. Lower memory (offset 0-127) is not paged, so the page of a field in lower memory is always 00h.
+    """
+    def __init__(self, page: int, offset: int, width: int = 1, shift: int = 0, mask: Optional[int] = None, decoder: Optional[Callable[[Any], Any]] = None, description: str = ""):
+        assert 0 <= offset and offset + width <= 256
+        assert offset >= 128 or offset + width <= 128, "A field can not span lower and upper memory"
+        self.page = page if offset >= 128 else 0x00
+        self.offset = offset
+        self.width = width
+        self.shift = shift
+        self.mask = mask
+        self.decoder = decoder
+        self.description = description
+
+    def decode(self, raw: bytes) -> Any:
+        """Decode the field from its raw bytes.
+        """
+        value: Any = raw
+        if self.mask is not None:
+            value = (int.from_bytes(raw, "big") >> self.shift) & self.mask
+        if self.decoder is not None:
+            value = self.decoder(value)
+        return value
+
+def _decode_ascii(raw: bytes) -> str:
+    return raw.decode("ascii", errors="replace").strip()
+
+def _decode_lane_nibbles(raw: bytes) -> List[int]:
+    # 2 lanes per byte, the odd lane in the low nibble
+    return [x for byte in raw for x in (byte & 0x0F, byte >> 4)]
+
+def _decode_lane_bits(raw: bytes) -> List[int]:
+    # 1 bit per lane, lane 1 in bit 0
+    return [(raw[0] >> i) & 0x01 for i in range(8)]
+
+def _decode_lane_u16(raw: bytes) -> List[int]:
+    return [int.from_bytes(raw[i:i+2], "big") for i in range(0, len(raw), 2)]
+
+def _decode_temperature(raw: bytes) -> float:
+    # signed, 1/256 degC
+    return int.from_bytes(raw, "big", signed=True)/256
+
+def _decode_voltage(raw: bytes) -> float:
+    # unsigned, 100 uV
+    return int.from_bytes(raw, "big")*0.0001
+
+# The CMIS fields used by the test suite. Lanes are numbered from 1, and per-lane fields are decoded into a list in lane order.
+CMIS_FIELDS: Dict[str, CMISField] = {
+    "identifier":                   CMISField(0x00, 0, description="SFF8024 identifier"),
+    "revision_compliance":          CMISField(0x00, 1, description="CMIS revision"),
+    "stepped_config_only":          CMISField(0x00, 2, shift=6, mask=0x01, description="Only stepped configuration supported"),
+    "auto_commissioning":           CMISField(0x00, 2, shift=0, mask=0x03, description="Auto commissioning"),
+    "module_state":                 CMISField(0x00, 3, shift=1, mask=0x07, description="Module state"),
+    "module_temperature":           CMISField(0x00, 14, 2, decoder=_decode_temperature, description="Module temperature (degC)"),
+    "supply_voltage":               CMISField(0x00, 16, 2, decoder=_decode_voltage, description="Supply voltage (V)"),
+    "vendor_name":                  CMISField(0x00, 129, 16, decoder=_decode_ascii, description="Vendor name"),
+    "vendor_pn":                    CMISField(0x00, 148, 16, decoder=_decode_ascii, description="Vendor part number"),
+    "vendor_rev":                   CMISField(0x00, 164, 2, decoder=_decode_ascii, description="Vendor revision"),
+    "vendor_sn":                    CMISField(0x00, 166, 16, decoder=_decode_ascii, description="Vendor serial number"),
+    "date_code":                    CMISField(0x00, 182, 8, decoder=_decode_ascii, description="Date code"),
+    "cable_length":                 CMISField(0x00, 202, description="Cable length, multiplier and base length"),
+    "rx_output_eq_control_support": CMISField(0x01, 162, shift=2, mask=0x07, description="RX output pre-cursor, post-cursor and amplitude control supported"),
+    "dp_config":                    CMISField(0x10, 145, 8, decoder=list, description="Staged Control Set 0 DPConfigLane, AppSelCode/DataPathID/ExplicitControl"),
+    "rx_output_eq_pre":             CMISField(0x10, 162, 4, decoder=_decode_lane_nibbles, description="Staged Control Set 0 RX output pre-cursor"),
+    "rx_output_eq_post":            CMISField(0x10, 166, 4, decoder=_decode_lane_nibbles, description="Staged Control Set 0 RX output post-cursor"),
+    "rx_output_amplitude":          CMISField(0x10, 170, 4, decoder=_decode_lane_nibbles, description="Staged Control Set 0 RX output amplitude"),
+    "tx_fault_flags":               CMISField(0x11, 135, decoder=_decode_lane_bits, description="Latched TX fault flags"),
+    "tx_los_flags":                 CMISField(0x11, 136, decoder=_decode_lane_bits, description="Latched TX LOS flags"),
+    "rx_los_flags":                 CMISField(0x11, 147, decoder=_decode_lane_bits, description="Latched RX LOS flags"),
+    "tx_power":                     CMISField(0x11, 154, 16, decoder=_decode_lane_u16, description="TX output power (0.1 uW)"),
+    "tx_bias":                      CMISField(0x11, 170, 16, decoder=_decode_lane_u16, description="TX bias current (2 uA)"),
+    "rx_power":                     CMISField(0x11, 186, 16, decoder=_decode_lane_u16, description="RX input power (0.1 uW)"),
+    "config_status":                CMISField(0x11, 202, 4, decoder=_decode_lane_nibbles, description="ConfigStatus"),
+    "acs_dp_config":                CMISField(0x11, 206, 8, description="Active Control Set DPConfigLane"),
+    "acs_rx_output_eq_pre":         CMISField(0x11, 221, 4, description="Active Control Set RX output pre-cursor"),
+    "acs_rx_output_eq_post":        CMISField(0x11, 225, 4, description="Active Control Set RX output post-cursor"),
+    "acs_rx_output_amplitude":      CMISField(0x11, 229, 4, description="Active Control Set RX output amplitude"),
+    "dp_deinit":                    CMISField(0x01, 128, description="DataPathDeinit, 1 bit per lane"),
+    "scs0_trigger":                 CMISField(0x01, 143, description="Provision or Provision-and-Commission trigger of Staged Control Set 0, 1 bit per lane"),
+}
+
+# Active Control Set field of each Staged Control Set 0 field. Once the module has applied a commit, the active fields hold the staged values.
+ACTIVE_CONTROL_SET_FIELDS: Dict[str, str] = {
+    "dp_config": "acs_dp_config",
+    "rx_output_eq_pre": "acs_rx_output_eq_pre",
+    "rx_output_eq_post": "acs_rx_output_eq_post",
+    "rx_output_amplitude": "acs_rx_output_amplitude",
+}
+
+# Two fields on the same page are read together if the gap between them is not larger than this
+CMIS_MAX_GAP = 16
+
+# (page, first byte, last byte) of the latched flags, which are cleared on read. They are never read as a gap filler.
+CMIS_CLEAR_ON_READ: List[Tuple[int, int, int]] = [(0x00, 8, 13), (0x11, 134, 153)]
+
+def _gap_is_readable(page: int, start: int, stop: int) -> bool:
+    for _page, _first, _last in CMIS_CLEAR_ON_READ:
+        if _page == page and start <= _last and _first < stop:
+            return False
+    return True
+
+# *************************************************************************************
+# func: plan_cmis_reads
+# description: Coalesce CMIS fields into contiguous reads
+# *************************************************************************************
+def plan_cmis_reads(fields: Iterable[CMISField]) -> List[Tuple[int, int, int]]:
+    """Coalesce CMIS fields into the minimum number of contiguous reads. Fields on the same page are merged into one read if they overlap or the gap between them is not larger than ``CMIS_MAX_GAP``, unless the gap has latched flags (``CMIS_CLEAR_ON_READ``). A read never spans lower and upper memory.
+
+    :param fields: CMIS fields
+    :type fields: Iterable[CMISField]
+    :return: (page, register address, byte count) of each read
+    :rtype: List[Tuple[int, int, int]]
+    """
+    reads: List[List[int]] = []
+    for field in sorted(fields, key=lambda x: (x.page, x.offset)):
+        _end = field.offset + field.width
+        if reads:
+            _page, _start, _stop = reads[-1]
+            if _page == field.page and (_start >= 128) == (field.offset >= 128) and (field.offset <= _stop or (field.offset <= _stop + CMIS_MAX_GAP and _gap_is_readable(_page, _stop, field.offset))):
+                reads[-1][2] = max(_stop, _end)
+                continue
+        reads.append([field.page, field.offset, _end])
+    return [(_page, _start, _stop - _start) for _page, _start, _stop in reads]
+
+# *************************************************************************************
+# func: read_cmis_fields
+# description: Read CMIS fields of a port with the minimum number of reads
+# *************************************************************************************
+async def read_cmis_fields(port: ports.Z800FreyaPort, names: Iterable[str], cache: Optional[CMISPageCache] = None) -> Dict[str, Any]:
+    """Read CMIS fields of a port. If a cache is given, fields in the static memory are served from it. The other fields are coalesced into contiguous reads (see :func:`plan_cmis_reads`), which are sent in one command group.
+
+    :param port: port object
+    :type port: ports.Z800FreyaPort
+    :param names: names of the fields in ``CMIS_FIELDS``
+    :type names: Iterable[str]
+    :param cache: CMIS page cache of the session, defaults to None
+    :type cache: Optional[CMISPageCache], optional
+    :return: decoded value of each field
+    :rtype: Dict[str, Any]
+    """
+    fields = {name: CMIS_FIELDS[name] for name in names}
+    result: Dict[str, Any] = {}
+    live_fields: Dict[str, CMISField] = {}
+    for name, field in fields.items():
+        if cache is not None and cache.covers(field.page, field.offset, field.width):
+            result[name] = field.decode(bytes.fromhex(await cache.read(port, field.page, field.offset, field.width)))
+        else:
+            live_fields[name] = field
+
+    if live_fields:
+        reads = plan_cmis_reads(live_fields.values())
+        resps = await utils.apply(*[port.transceiver.access_rw_seq(page_address=_page, register_address=_reg_addr, byte_count=_size).get() for _page, _reg_addr, _size in reads])
+        for name, field in live_fields.items():
+            for (_page, _reg_addr, _size), resp in zip(reads, resps):
+                if _page == field.page and _reg_addr <= field.offset and field.offset + field.width <= _reg_addr + _size:
+                    _offset = field.offset - _reg_addr
+                    result[name] = field.decode(bytes.fromhex(resp.value)[_offset:_offset+field.width])
+                    break
+    return result
+
+# *************************************************************************************
+# func: read_cmis_fields_all
+# description: Read CMIS fields of all ports concurrently
+# *************************************************************************************
+async def read_cmis_fields_all(port_obj_list: List[ports.Z800FreyaPort], names: Iterable[str], cache: Optional[CMISPageCache] = None) -> List[Dict[str, Any]]:
+    """Read the same CMIS fields of all ports concurrently.
+
+    :param port_obj_list: ports
+    :type port_obj_list: List[ports.Z800FreyaPort]
+    :param names: names of the fields in ``CMIS_FIELDS``
+    :type names: Iterable[str]
+    :param cache: CMIS page cache of the session, defaults to None
+    :type cache: Optional[CMISPageCache], optional
+    :return: decoded fields of each port, in the order of the ports
+    :rtype: List[Dict[str, Any]]
+    """
+    names = list(names)
+    return list(await asyncio.gather(*[read_cmis_fields(port, names, cache) for port in port_obj_list]))
+
+# RX output eq field of each cursor
+OUTPUT_EQ_FIELDS: Dict[Cursor, str] = {
+    Cursor.Precursor: "rx_output_eq_pre",
+    Cursor.Postcursor: "rx_output_eq_post",
+    Cursor.Amplitude: "rx_output_amplitude",
+}
 
 # *************************************************************************************
 # func: hot_reconfiguration_supported
 # description: Check if the transceiver supports hot reconfiguration
 # *************************************************************************************
-async def hot_reconfiguration_supported(port: ports.Z800FreyaPort, logger_name: str) -> bool:
+async def hot_reconfiguration_supported(port: ports.Z800FreyaPort, logger_name: str, cache: Optional[CMISPageCache] = None) -> bool:
     """Check if the transceiver supports hot reconfiguration
     """
     # Get logger
     logger = logging.getLogger(logger_name)
     logger.info(f"Port {port.kind.module_id}/{port.kind.port_id}: Check if supports hot reconfiguration")
-    resp = await port.transceiver.access_rw_seq(page_address=0x00, register_address=2, byte_count=1).get()
-    int_value = int(resp.value, 16)
-    stepped_config_only = (int_value >> 6) & 0x01
-    if stepped_config_only == 0:
+    # both fields are in the static memory, served from the cache if one is given
+    fields = await read_cmis_fields(port, ["stepped_config_only", "auto_commissioning"], cache)
+    if fields["stepped_config_only"] == 0:
         return True
     else:
-        auto_commisioning = int_value & 0x03
-        if auto_commisioning == 2:
+        if fields["auto_commissioning"] == 2:
             return True
         else:
             return False
@@ -43,17 +358,8 @@ async def read_config_status(port: ports.Z800FreyaPort, lane: int, logger_name:
     logger.info(f"Port {port.kind.module_id}/{port.kind.port_id}: Read ConfigStatus - Lane {lane} ")
     assert 1<=lane<=8
 
-    _page = 0x11
-    _start_addr = 202
-    _reg_addr = _start_addr + int((lane-1)/2)
-    _size = 1
-    resp = await port.transceiver.access_rw_seq(page_address=_page, register_address=_reg_addr, byte_count=_size).get()
-    if lane % 2 == 0:
-        _tmp = int(resp.value, 16) & 0xF0
-        _read = _tmp >> 4
-    else:
-        _tmp = int(resp.value, 16) & 0x0F
-        _read = _tmp
+    fields = await read_cmis_fields(port, ["config_status"])
+    _read = fields["config_status"][lane-1]
     logger.info(f"  Read operation done. Value: ConfigStatus={ConfigStatus(_read).name}")
     return ConfigStatus(_read)
         
@@ -68,13 +374,8 @@ async def rx_output_eq_control_supported(port: ports.Z800FreyaPort, logger_name:
     logger = logging.getLogger(logger_name)
     logger.info(f"Port {port.kind.module_id}/{port.kind.port_id}: Check if supports RX output eq contorl")
 
-    _page = 0x01
-    _start_addr = 162
-    _reg_addr = _start_addr
-    _size = 1
-    resp = await port.transceiver.access_rw_seq(page_address=_page, register_address=_reg_addr, byte_count=_size).get()
-    int_value = int(resp.value, 16)
-    support_flags = (int_value >> 2) & 0x07
+    fields = await read_cmis_fields(port, ["rx_output_eq_control_support"])
+    support_flags = fields["rx_output_eq_control_support"]
     if support_flags != 0x07:
         return False
     else:
@@ -92,12 +393,11 @@ async def apply_dp_deinit(port: ports.Z800FreyaPort, logger_name: str):
     logger = logging.getLogger(logger_name)
     logger.info(f"Port {port.kind.module_id}/{port.kind.port_id}: Deinitialize the Data Path associated with host lane (Write address 128 value with 0xFF)")
 
-    _page = 0x01
-    _start_addr = 128
-    _reg_addr = _start_addr
-    _size = 1
+    _field = CMIS_FIELDS["dp_deinit"]
+    _page = _field.page
+    _reg_addr = _field.offset
+    _size = _field.width
     await port.transceiver.access_rw_seq(page_address=_page, register_address=_reg_addr, byte_count=_size).set(value=Hex("FF"))
-    await asyncio.sleep(1)
 
 # *************************************************************************************
 # func: trigger_provision
@@ -112,12 +412,11 @@ async def trigger_provision(port: ports.Z800FreyaPort, logger_name: str):
     logger = logging.getLogger(logger_name)
     logger.info(f"Port {port.kind.module_id}/{port.kind.port_id}: Trigger Provision")
 
-    _page = 0x01
-    _start_addr = 143
-    _reg_addr = _start_addr
-    _size = 1
+    _field = CMIS_FIELDS["scs0_trigger"]
+    _page = _field.page
+    _reg_addr = _field.offset
+    _size = _field.width
     await port.transceiver.access_rw_seq(page_address=_page, register_address=_reg_addr, byte_count=_size).set(value=Hex("FF"))
-    await asyncio.sleep(1)
 
 # *************************************************************************************
 # func: trigger_provision_commission
@@ -133,12 +432,11 @@ async def trigger_provision_commission(port: ports.Z800FreyaPort, logger_name: s
     logger = logging.getLogger(logger_name)
     logger.info(f"Port {port.kind.module_id}/{port.kind.port_id}: Trigger Provision-and-Commission")
 
-    _page = 0x01
-    _start_addr = 143
-    _reg_addr = _start_addr
-    _size = 1
+    _field = CMIS_FIELDS["scs0_trigger"]
+    _page = _field.page
+    _reg_addr = _field.offset
+    _size = _field.width
     await port.transceiver.access_rw_seq(page_address=_page, register_address=_reg_addr, byte_count=_size).set(value=Hex("FF"))
-    await asyncio.sleep(1)
 
 # *************************************************************************************
 # func: apply_dp_init
@@ -152,12 +450,11 @@ async def apply_dp_init(port: ports.Z800FreyaPort, logger_name: str):
     logger = logging.getLogger(logger_name)
     logger.info(f"Port {port.kind.module_id}/{port.kind.port_id}: Initialize the Data Path associated with host lan (Write address 128 with value 0x00)")
 
-    _page = 0x01
-    _start_addr = 128
-    _reg_addr = _start_addr
-    _size = 1
+    _field = CMIS_FIELDS["dp_deinit"]
+    _page = _field.page
+    _reg_addr = _field.offset
+    _size = _field.width
     await port.transceiver.access_rw_seq(page_address=_page, register_address=_reg_addr, byte_count=_size).set(value=Hex("00"))
-    await asyncio.sleep(1)
 
 # *************************************************************************************
 # func: output_eq_write
@@ -172,9 +469,9 @@ async def output_eq_write(port: ports.Z800FreyaPort, lane: int, db: int, cursor:
     assert 1<=lane<=8
     assert 0<=db<=7
 
-    _page = 0x10
-    _start_addr = 162
-    _reg_addr = _start_addr + int(cursor.value*4) + int((lane-1)/2)
+    _field = CMIS_FIELDS[OUTPUT_EQ_FIELDS[cursor]]
+    _page = _field.page
+    _reg_addr = _field.offset + int((lane-1)/2)
     _size = 1
     
     # read the byte from the address
@@ -194,7 +491,7 @@ async def output_eq_write(port: ports.Z800FreyaPort, lane: int, db: int, cursor:
     else:
         _tmp = (current_byte & 0xF0) + db
     await port.transceiver.access_rw_seq(page_address=_page, register_address=_reg_addr, byte_count=_size).set(value=Hex('{:02X}'.format(_tmp)))
-    await asyncio.sleep(1)
+    await wait_register_value(port, _page, _reg_addr, _size, '{:02X}'.format(_tmp), logger_name)
     
 # *************************************************************************************
 # func: output_eq_read
@@ -208,20 +505,8 @@ async def output_eq_read(port: ports.Z800FreyaPort, lane: int, cursor: Cursor, l
     logger.info(f"Port {port.kind.module_id}/{port.kind.port_id}: Read dB from {cursor.name} - Lane {lane} ")
     assert 1<=lane<=8
 
-    _page = 0x10
-    _start_addr = 162
-    _reg_addr = _start_addr + int(cursor.value*4) + int((lane-1)/2)
-    _size = 1
-
-    # read the byte from the address
-    resp = await port.transceiver.access_rw_seq(page_address=_page, register_address=_reg_addr, byte_count=_size).get()
-    current_byte = int(resp.value, 16) # convert the existing byte value from hex string to int
-    if lane % 2 == 0:
-        _tmp = int(resp.value, 16) & 0xF0
-        _read = _tmp >> 4
-    else:
-        _tmp = int(resp.value, 16) & 0x0F
-        _read = _tmp
+    fields = await read_cmis_fields(port, [OUTPUT_EQ_FIELDS[cursor]])
+    _read = fields[OUTPUT_EQ_FIELDS[cursor]][lane-1]
     logger.info(f"  Current value: {_read} dB")
     return _read
 
@@ -238,17 +523,11 @@ async def dp_read(port: ports.Z800FreyaPort, lane: int, logger_name: str):
     logger.info(f"Port {port.kind.module_id}/{port.kind.port_id}: Read Data Path config - Lane {lane} ")
     assert 1<=lane<=8
 
-    _page = 0x10
-    _start_addr = 145
-    _reg_addr = _start_addr + (lane-1)
-    _size = 1
-    
-    # read the byte from the address again to verify the write
-    resp = await port.transceiver.access_rw_seq(page_address=_page, register_address=_reg_addr, byte_count=_size).get()
-    await asyncio.sleep(1)
-    appsel_code = int(resp.value, 16) >> 4
-    dp_id = (int(resp.value, 16) >> 1) & 0x07
-    explicit_ctrl = int(resp.value, 16) & 0x01
+    fields = await read_cmis_fields(port, ["dp_config"])
+    _byte = fields["dp_config"][lane-1]
+    appsel_code = _byte >> 4
+    dp_id = (_byte >> 1) & 0x07
+    explicit_ctrl = _byte & 0x01
     logger.info(f"  Read operation done. Value: AppSelCode={appsel_code}, DataPathID={dp_id}, ExplicitControl={explicit_ctrl}")
     return appsel_code, dp_id, explicit_ctrl
 
@@ -268,16 +547,16 @@ async def dp_write(port: ports.Z800FreyaPort, lane: int, appsel_code: int, dp_id
     assert 0<=dp_id<=7
     assert 0<=explicit_ctrl<=1
 
-    _page = 0x10
-    _start_addr = 145
-    _reg_addr = _start_addr + (lane-1)
+    _field = CMIS_FIELDS["dp_config"]
+    _page = _field.page
+    _reg_addr = _field.offset + (lane-1)
     _size = 1
 
     _tmp = (appsel_code<<4) + (dp_id<<1) + explicit_ctrl
     
     # write the new byte into the address
     await port.transceiver.access_rw_seq(page_address=_page, register_address=_reg_addr, byte_count=_size).set(value=Hex('{:02X}'.format(_tmp)))
-    await asyncio.sleep(1)
+    await wait_register_value(port, _page, _reg_addr, _size, '{:02X}'.format(_tmp), logger_name)
 
 # *************************************************************************************
 # func: output_eq_write_all
@@ -291,15 +570,15 @@ async def output_eq_write_all(port: ports.Z800FreyaPort, db: int, cursor: Cursor
     logger.info(f"Port {port.kind.module_id}/{port.kind.port_id}: Write {db} dB to {cursor.name}")
     assert 0<=db<=7
 
-    _page = 0x10
-    _start_addr = 162
-    _reg_addr = _start_addr + int(cursor.value*4)
-    _size = 4
+    _field = CMIS_FIELDS[OUTPUT_EQ_FIELDS[cursor]]
+    _page = _field.page
+    _reg_addr = _field.offset
+    _size = _field.width
     
     _value = (db << 4) | db
     _hex_value = Hex('{:02X}'.format(_value)*4)
     await port.transceiver.access_rw_seq(page_address=_page, register_address=_reg_addr, byte_count=_size).set(value=_hex_value)
-    await asyncio.sleep(1)
+    await wait_register_value(port, _page, _reg_addr, _size, _hex_value, logger_name)
 
 # *************************************************************************************
 # func: read_config_status_all
@@ -312,18 +591,10 @@ async def read_config_status_all(port: ports.Z800FreyaPort, logger_name: str) ->
     logger = logging.getLogger(logger_name)
     logger.info(f"Port {port.kind.module_id}/{port.kind.port_id}: Read ConfigStatus")
 
-    _page = 0x11
-    _start_addr = 202
-    _reg_addr = _start_addr
-    _size = 4
-    resp = await port.transceiver.access_rw_seq(page_address=_page, register_address=_reg_addr, byte_count=_size).get()
-    all_status_hexstring = resp.value
-    
-    n = 1
-    config_status_str_list = [all_status_hexstring[i:i+n] for i in range(0, len(all_status_hexstring), n)]
-    config_status_list = [ConfigStatus(int(x, 16)) for x in config_status_str_list]
+    fields = await read_cmis_fields(port, ["config_status"])
+    config_status_list = [ConfigStatus(x) for x in fields["config_status"]]
 
-    logger.info(f"  Read operation done. Value: ConfigStatusList={config_status_str_list}")
+    logger.info(f"  Read operation done. Value: ConfigStatusList={[x.name for x in config_status_list]}")
     return config_status_list
 
 
@@ -338,24 +609,140 @@ async def output_eq_read_all(port: ports.Z800FreyaPort, cursor: Cursor, logger_n
     logger = logging.getLogger(logger_name)
     logger.info(f"Port {port.kind.module_id}/{port.kind.port_id}: Read dB from {cursor.name}")
 
-    _page = 0x10
-    _start_addr = 162
-    _reg_addr = _start_addr + int(cursor.value*4)
-    _size = 4
-
-    # read the byte from the address
-    resp = await port.transceiver.access_rw_seq(page_address=_page, register_address=_reg_addr, byte_count=_size).get()
-    all_eq_hexstring = resp.value
-
-    n = 1
-    eq_str_list = [all_eq_hexstring[i:i+n] for i in range(0, len(all_eq_hexstring), n)]
-    final_eq_list = []
-    final_eq_list.append(int(eq_str_list[1], 16))
-    final_eq_list.append(int(eq_str_list[0], 16))
-    final_eq_list.append(int(eq_str_list[3], 16))
-    final_eq_list.append(int(eq_str_list[2], 16))
-    final_eq_list.append(int(eq_str_list[5], 16))
-    final_eq_list.append(int(eq_str_list[4], 16))
-    final_eq_list.append(int(eq_str_list[7], 16))
-    final_eq_list.append(int(eq_str_list[6], 16))
+    fields = await read_cmis_fields(port, [OUTPUT_EQ_FIELDS[cursor]])
+    final_eq_list = fields[OUTPUT_EQ_FIELDS[cursor]]
     return final_eq_list
+
+
+# *************************************************************************************
+# class: CMISTransaction
+# description: Staged Control Set 0 writes of a port, sent together and committed
+# with one Provision-and-Commission trigger
+# *************************************************************************************
+class CMISTransaction:
+    """Staged Control Set 0 writes of a port. The writes are only staged in memory until :meth:`commit`, which sends them together with the Provision-and-Commission trigger in one command group. The writes are not read back one by one, the outcome is the ConfigStatus of the lanes and the Active Control Set, see :meth:`wait_config_status`.
+
+    Usage::
+
+        txn = CMISTransaction(port, logger_name)
+        txn.output_eq_write_all(pre, Cursor.Precursor)
+        txn.output_eq_write_all(main, Cursor.Amplitude)
+        txn.output_eq_write_all(post, Cursor.Postcursor)
+        await txn.commit()
+        config_status_list = await txn.wait_config_status()
+        if not txn.config_completed:
+            logger.warning("ConfigStatus not updated in time")
+    """
+    def __init__(self, port: ports.Z800FreyaPort, logger_name: str):
+        self.port = port
+        self.logger_name = logger_name
+        # (page, register address) -> byte value
+        self.staged: Dict[Tuple[int, int], int] = {}
+        # ConfigStatus of the lanes right before the trigger, and whether the lanes reported the outcome of this commit
+        self.config_status_before: Optional[List[ConfigStatus]] = None
+        self.config_completed = False
+        # (Active Control Set field, byte index) -> byte value expected once the commit is applied
+        self.active_expected: Dict[Tuple[str, int], int] = {}
+
+    def _stage(self, page: int, reg_addr: int, data: bytes) -> None:
+        for i, byte in enumerate(data):
+            self.staged[(page, reg_addr + i)] = byte
+
+    def output_eq_write_all(self, db: int, cursor: Cursor) -> None:
+        """Stage an output eq dB value of a cursor on all lanes.
+        """
+        assert 0<=db<=7
+        _field = CMIS_FIELDS[OUTPUT_EQ_FIELDS[cursor]]
+        self._stage(_field.page, _field.offset, bytes([(db << 4) | db] * _field.width))
+
+    def dp_write(self, lane: int, appsel_code: int, dp_id: int, explicit_ctrl: int) -> None:
+        """Stage AppSelCode, DataPathID, and ExplicitControl of a lane.
+        """
+        assert 1<=lane<=8
+        assert 0<=appsel_code<=15
+        assert 0<=dp_id<=7
+        assert 0<=explicit_ctrl<=1
+        _field = CMIS_FIELDS["dp_config"]
+        self._stage(_field.page, _field.offset + (lane-1), bytes([(appsel_code<<4) + (dp_id<<1) + explicit_ctrl]))
+
+    @staticmethod
+    def _active_address(page: int, reg_addr: int) -> Optional[Tuple[str, int]]:
+        # Active Control Set field and byte index of a staged byte
+        for staged_name, active_name in ACTIVE_CONTROL_SET_FIELDS.items():
+            _field = CMIS_FIELDS[staged_name]
+            if _field.page == page and _field.offset <= reg_addr < _field.offset + _field.width:
+                return active_name, reg_addr - _field.offset
+        return None
+
+    def _active_control_set_applied(self, fields: Dict[str, Any]) -> bool:
+        return bool(self.active_expected) and all(fields[name][index] == byte for (name, index), byte in self.active_expected.items())
+
+    def _write_tokens(self) -> List[Any]:
+        # contiguous staged bytes on the same page are sent in one write
+        runs: List[List[Any]] = []
+        for (_page, _reg_addr) in sorted(self.staged):
+            _byte = self.staged[(_page, _reg_addr)]
+            if runs and runs[-1][0] == _page and runs[-1][1] + len(runs[-1][2]) == _reg_addr:
+                runs[-1][2].append(_byte)
+            else:
+                runs.append([_page, _reg_addr, [_byte]])
+        return [
+            self.port.transceiver.access_rw_seq(page_address=_page, register_address=_reg_addr, byte_count=len(_data)).set(value=Hex(bytes(_data).hex().upper()))
+            for _page, _reg_addr, _data in runs
+        ]
+
+    async def commit(self) -> None:
+        """Send the staged writes and trigger the Provision-and-Commission procedure, in one command group. The ConfigStatus of the lanes is read in the same command group right before the writes, so that :meth:`wait_config_status` can tell the outcome of this commit from the one of an earlier commit.
+        """
+        logger = logging.getLogger(self.logger_name)
+        logger.info(f"Port {self.port.kind.module_id}/{self.port.kind.port_id}: Commit {len(self.staged)} staged bytes and trigger Provision-and-Commission")
+        _status = CMIS_FIELDS["config_status"]
+        _trigger = CMIS_FIELDS["scs0_trigger"]
+        resps = await utils.apply(
+            self.port.transceiver.access_rw_seq(page_address=_status.page, register_address=_status.offset, byte_count=_status.width).get(),
+            *self._write_tokens(),
+            self.port.transceiver.access_rw_seq(page_address=_trigger.page, register_address=_trigger.offset, byte_count=_trigger.width).set(value=Hex("FF")),
+        )
+        self.config_status_before = [ConfigStatus(x) for x in _status.decode(bytes.fromhex(resps[0].value))]
+        self.config_completed = False
+        self.active_expected = {}
+        for (_page, _reg_addr), _byte in self.staged.items():
+            _address = self._active_address(_page, _reg_addr)
+            if _address is None:
+                # a staged byte without an active copy, the outcome can only be told from the ConfigStatus
+                self.active_expected = {}
+                break
+            self.active_expected[_address] = _byte
+        self.staged.clear()
+
+    async def wait_config_status(self, timeout: float = 10.0) -> List[ConfigStatus]:
+        """Poll the ConfigStatus and the Active Control Set of all lanes until every lane reports the outcome of the last :meth:`commit`, or the timeout expires.
+
+        A status left over from an earlier commit, e.g. ConfigSuccess of the previous provisioning, must not be taken as the outcome on its own. A lane is done once it is no longer ConfigInProgress and either it has been seen ConfigInProgress since the trigger, its status differs from the one read before the trigger, or it is ConfigSuccess and the Active Control Set holds the committed values. The last case covers a module that applies the commit before the first poll. :attr:`config_completed` tells if all lanes are done.
+
+        :param timeout: timeout in seconds, defaults to 10.0
+        :type timeout: float, optional
+        :return: the last read ConfigStatus of each lane
+        :rtype: List[ConfigStatus]
+        """
+        assert self.config_status_before is not None, "Call commit() first"
+        logger = logging.getLogger(self.logger_name)
+        names = ["config_status", *sorted({name for name, _ in self.active_expected})]
+        config_status_list: List[ConfigStatus] = []
+        seen_in_progress = [False] * len(self.config_status_before)
+        async def _config_done() -> bool:
+            # ConfigStatus and Active Control Set are on the same page, they are read together
+            fields = await read_cmis_fields(self.port, names)
+            config_status_list[:] = [ConfigStatus(x) for x in fields["config_status"]]
+            active_applied = self._active_control_set_applied(fields)
+            logger.info(f"Port {self.port.kind.module_id}/{self.port.kind.port_id}: ConfigStatusList={[x.name for x in config_status_list]}, ActiveControlSetApplied={active_applied}")
+            done = True
+            for i, (config_status, config_status_before) in enumerate(zip(config_status_list, self.config_status_before)):
+                if config_status == ConfigStatus.ConfigInProgress:
+                    seen_in_progress[i] = True
+                    done = False
+                elif not seen_in_progress[i] and config_status == config_status_before and not (active_applied and config_status == ConfigStatus.ConfigSuccess):
+                    done = False
+            return done
+        self.config_completed = await wait_until("cmis_config_status", _config_done, timeout=timeout, logger_name=self.logger_name)
+        return config_status_list
@@ -8,6 +8,8 @@ from xoa_driver import enums
 from .utils import *
 from .subtests import *
 from .models import *
+from .scheduler import StepScheduler
+from .enums import TestResource
 import yaml, json
 from pathlib import Path
 import logging
@@ -28,6 +30,7 @@ class XenaCableQualification:
         self.test_config_file = test_config_file
         self.test_config: CableQualificationTestConfig
         self.tester_obj: testers.L23Tester
+        self.port_lease: PortLeaseManager
 
         self.load_test_config(test_config_file)
 
@@ -35,10 +38,13 @@ class XenaCableQualification:
         """Connect to the Xena chassis and create a tester object.
         """
         self.tester_obj = await testers.L23Tester(host=self.chassis_ip, username=self.username, password=self.password, port=self.tcp_port, enable_logging=self.enable_comm_trace)
+        self.port_lease = PortLeaseManager(self.tester_obj, self.logger_name)
 
     async def disconnect(self):
-        """Disconnect from the Xena chassis.
+        """Release the ports reserved during the session and disconnect from the Xena chassis.
         """
+        await self.port_lease.release_all()
+        self.port_lease.cmis_cache.clear()
         await self.tester_obj.session.logoff()
         logger = logging.getLogger(self.logger_name)
         logger.info(f"Gracefully disconnect from tester")
@@ -58,7 +64,7 @@ class XenaCableQualification:
     async def create_report_dir(self):
         """Create a report directory for the test results. The directory is named with the current date and time, and is created in the same directory as the test configuration file.
         """
-        self.path = await create_report_dir(self.tester_obj, self.port_pair_list)
+        self.path = await create_report_dir(self.tester_obj, self.port_pair_list, self.port_lease.cmis_cache)
         # configure basic logger
         logging.basicConfig(
             format="%(asctime)s  %(message)s",
@@ -131,6 +137,10 @@ class XenaCableQualification:
     def latency_frameloss_test_config(self):
         return self.test_config.latency_frameloss_test_config.model_dump()
     
+    @property
+    def siv_test_config(self):
+        return self.test_config.siv_test_config.model_dump()
+
     @property
     def host_tx_eq(self):
         return self.test_config.host_tx_eq.model_dump()
@@ -142,42 +152,44 @@ class XenaCableQualification:
     async def run_prbs_test(self):
         """Run the PRBS test on the specified port pairs. The test is configured using the prbs_test_config property.
         """
-        await prbs_test(self.tester_obj, self.port_pair_list, self.report_filepathname, self.logger_name, self.prbs_test_config)
+        await prbs_test(self.tester_obj, self.port_pair_list, self.report_filepathname, self.logger_name, self.prbs_test_config, self.port_lease)
 
     async def run_fec_test(self):
         """Run the FEC test on the specified port pairs. The test is configured using the fec_test_config property.
         """
-        await fec_test(self.tester_obj, self.port_pair_list, self.report_filepathname, self.logger_name, self.prbs_test_config)
+        await fec_test(self.tester_obj, self.port_pair_list, self.report_filepathname, self.logger_name, self.fec_test_config, self.port_lease)
 
     async def run_latency_frame_loss_test(self):
         """Run the latency and frame loss test on the specified port pairs. The test is configured using the latency_frameloss_test_config property.
         """
-        await latency_frame_loss_test(self.tester_obj, self.port_pair_list, self.report_filepathname, self.logger_name, self.latency_frameloss_test_config)
+        await latency_frame_loss_test(self.tester_obj, self.port_pair_list, self.report_filepathname, self.logger_name, self.latency_frameloss_test_config, self.port_lease)
 
     async def get_siv_sample(self):
-        """Get the Signal Integrity Verification (SIV) sample for the specified port pairs. The SIV test is configured using the signal_integrity_test_config property.
+        """Get the Signal Integrity Verification (SIV) sample for the specified port pairs, and record the PAM4 eye metrics of the same captures in the report. The SIV test is configured using the siv_test_config property.
         """
-        await signal_integrity_info(self.tester_obj, self.port_pair_list, self.logger_name, should_histogram=False, path=self.path)
+        await signal_integrity_info(self.tester_obj, self.port_pair_list, self.logger_name, should_histogram=False, path=self.path, test_config=self.siv_test_config, port_lease=self.port_lease, report_filename=self.report_filepathname)
 
     async def get_siv_histogram(self):
-        """Get the Signal Integrity Verification (SIV) histogram for the specified port pairs. The SIV test is configured using the signal_integrity_test_config property.
+        """Get the Signal Integrity Verification (SIV) histogram for the specified port pairs. The SIV test is configured using the siv_test_config property.
         """
-        await signal_integrity_info(self.tester_obj, self.port_pair_list, self.logger_name, should_histogram=True, path=self.path)
+        await signal_integrity_info(self.tester_obj, self.port_pair_list, self.logger_name, should_histogram=True, path=self.path, test_config=self.siv_test_config, port_lease=self.port_lease)
 
     async def get_tcvr_basic_info(self):
         """Get the TCVR basic information for the specified port pairs. The TCVR test is configured using the tcvr_basic_info_test_config property.
         """
-        await tcvr_basic_info(self.tester_obj, self.port_pair_list, self.report_filepathname, self.logger_name)
+        await tcvr_basic_info(self.tester_obj, self.port_pair_list, self.report_filepathname, self.logger_name, self.port_lease)
 
     async def change_test_module_media_tg(self):
         """Change the module media type to TGA for the specified port pairs. The media type is configured using the module_media_tga property.
         """
-        await change_module_media(self.tester_obj, self.module_list, self.module_media_tga, self.port_speed, self.logger_name,)
+        await self.port_lease.release_all()
+        await change_module_media(self.tester_obj, self.module_list, self.module_media_tga, self.port_speed, self.logger_name, self.port_lease.cmis_cache)
 
     async def change_test_module_media_l1(self):
         """Change the module media type to L1 for the specified port pairs. The media type is configured using the module_media_l1 property.
         """
-        await change_module_media(self.tester_obj, self.module_list, self.module_media_l1, self.port_speed, self.logger_name,)
+        await self.port_lease.release_all()
+        await change_module_media(self.tester_obj, self.module_list, self.module_media_l1, self.port_speed, self.logger_name, self.port_lease.cmis_cache)
 
     async def read_host_tx_eq(self):
         """Read the host TX equalization settings for the specified port pairs.
@@ -187,33 +199,50 @@ class XenaCableQualification:
     async def load_host_tx_eq(self):
         """Load the host TX equalization settings for the specified port pairs. The TX equalization settings are configured using the host_tx_eq property.
         """
-        await load_host_tx_eq(self.tester_obj, self.port_pair_list, self.logger_name, self.host_tx_eq)
+        await load_host_tx_eq(self.tester_obj, self.port_pair_list, self.logger_name, self.host_tx_eq, self.port_lease)
 
     async def load_module_tx_eq(self):
         """Load the module TX equalization settings for the specified port pairs. The TX equalization settings are configured using the module_tx_eq property.
         """
-        await load_module_tx_eq(self.tester_obj, self.port_pair_list, self.logger_name, self.module_tx_eq)
+        await load_module_tx_eq(self.tester_obj, self.port_pair_list, self.logger_name, self.module_tx_eq, self.port_lease)
 
     async def read_module_tx_eq(self):
         """Read the module TX equalization settings for the specified port pairs.
         """
         await read_module_tx_eq(self.tester_obj, self.port_pair_list, self.report_filepathname, self.logger_name)
     
+    def build_test_sequence(self) -> StepScheduler:
+        """Build the test sequence. Each step declares the test resources it reads and writes, so that the scheduler can run independent steps concurrently while keeping the order of the dependent ones.
+
+        :return: the scheduler with all the test steps added
+        :rtype: StepScheduler
+        """
+        MEDIA = TestResource.Media
+        PORTS = TestResource.Ports
+        HOST_EQ = TestResource.HostTxEq
+        MODULE_EQ = TestResource.ModuleTxEq
+        TCVR = TestResource.Transceiver
+        LINE = TestResource.Line
+
+        scheduler = StepScheduler(self.logger_name)
+        scheduler.add_step("change_test_module_media_l1", self.change_test_module_media_l1, writes=[MEDIA, PORTS, HOST_EQ, MODULE_EQ])
+        scheduler.add_step("get_tcvr_basic_info", self.get_tcvr_basic_info, reads=[MEDIA, PORTS, TCVR])
+        scheduler.add_step("load_host_tx_eq_l1", self.load_host_tx_eq, reads=[MEDIA, PORTS], writes=[HOST_EQ])
+        scheduler.add_step("read_host_tx_eq", self.read_host_tx_eq, reads=[MEDIA, PORTS, HOST_EQ])
+        scheduler.add_step("load_module_tx_eq_l1", self.load_module_tx_eq, reads=[MEDIA, PORTS], writes=[MODULE_EQ, TCVR])
+        scheduler.add_step("read_module_tx_eq", self.read_module_tx_eq, reads=[MEDIA, PORTS, MODULE_EQ, TCVR])
+        scheduler.add_step("run_prbs_test", self.run_prbs_test, reads=[MEDIA, HOST_EQ, MODULE_EQ], writes=[PORTS, LINE])
+        scheduler.add_step("run_fec_test", self.run_fec_test, reads=[MEDIA, HOST_EQ, MODULE_EQ], writes=[PORTS, LINE])
+        scheduler.add_step("get_siv_sample", self.get_siv_sample, reads=[MEDIA, PORTS, HOST_EQ, MODULE_EQ], writes=[LINE])
+        scheduler.add_step("get_siv_histogram", self.get_siv_histogram, reads=[MEDIA, PORTS, HOST_EQ, MODULE_EQ], writes=[LINE])
+        scheduler.add_step("change_test_module_media_tg", self.change_test_module_media_tg, writes=[MEDIA, PORTS, HOST_EQ, MODULE_EQ])
+        scheduler.add_step("load_host_tx_eq_tg", self.load_host_tx_eq, reads=[MEDIA, PORTS], writes=[HOST_EQ])
+        scheduler.add_step("load_module_tx_eq_tg", self.load_module_tx_eq, reads=[MEDIA, PORTS], writes=[MODULE_EQ, TCVR])
+        scheduler.add_step("run_latency_frame_loss_test", self.run_latency_frame_loss_test, reads=[MEDIA, HOST_EQ, MODULE_EQ], writes=[PORTS, LINE])
+        return scheduler
+
     async def run(self):
         await self.connect()
         await self.create_report_dir()
-        await self.change_test_module_media_l1()
-        await self.get_tcvr_basic_info()
-        await self.load_host_tx_eq()
-        await self.read_host_tx_eq()
-        await self.load_module_tx_eq()
-        await self.read_module_tx_eq()
-        await self.run_prbs_test()
-        await self.run_fec_test()
-        await self.get_siv_sample()
-        await self.get_siv_histogram()
-        await self.change_test_module_media_tg()
-        await self.load_host_tx_eq()
-        await self.load_module_tx_eq()
-        await self.run_latency_frame_loss_test()
+        await self.build_test_sequence().run()
         await self.disconnect()
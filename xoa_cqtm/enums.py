@@ -37,3 +37,23 @@ class ConfigStatus(IntEnum):
     ConfigInProgress = 0x0C
     """Configuration in progress
     """
+
+class TestResource(IntEnum):
+    Media = 0
+    """Module media configuration and port speed
+    """
+    Ports = 1
+    """Port reservation, reset and port-level configuration
+    """
+    HostTxEq = 2
+    """Host-side TX equalization of the serdes lanes
+    """
+    ModuleTxEq = 3
+    """Module-side TX equalization (CMIS Staged Control Set)
+    """
+    Transceiver = 4
+    """Transceiver registers accessed over I2C
+    """
+    Line = 5
+    """The link itself, i.e. PRBS, FEC, SIV and traffic measurements
+    """
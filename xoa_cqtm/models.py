@@ -2,7 +2,8 @@
 # author: leonard.yu@teledyne.com
 # *************************************
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
 
 class LatencyFrameLossTestConfig(BaseModel):
     start_rate: float
@@ -10,13 +11,24 @@ class LatencyFrameLossTestConfig(BaseModel):
     step_rate: float
     packet_sizes: list[int]
     duration: int
+    mode: Literal["sweep", "throughput"] = "sweep"
+    resolution: float = Field(default=0.01, gt=0)
 
 class FECTestConfig(BaseModel):
     duration: int
+    interval: float = Field(default=1.0, gt=0)
 
 class PRBSTestConfig(BaseModel):
     duration: int
     polynomial: str
+    interval: float = Field(default=1.0, gt=0)
+    target_ber: Optional[float] = Field(default=None, gt=0)
+    confidence: float = Field(default=0.99, gt=0, lt=1)
+
+class SIVTestConfig(BaseModel):
+    captures: int = Field(default=1, ge=1)
+    buffer_depth: int = Field(default=16, ge=1)
+    render: bool = True
 
 class PortPair(BaseModel):
     tx: str
@@ -50,5 +62,6 @@ class CableQualificationTestConfig(BaseModel):
     prbs_test_config: PRBSTestConfig
     fec_test_config: FECTestConfig
     latency_frameloss_test_config: LatencyFrameLossTestConfig
+    siv_test_config: SIVTestConfig = SIVTestConfig()
     host_tx_eq: HostTxEq
     module_tx_eq: ModuleTxEq
\ No newline at end of file
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+# *************************************************************************************
+# class: SettleTimeTracker
+# description: Keep the observed settle times of each readiness condition
+# *************************************************************************************
+class SettleTimeTracker:
+    """Keep the recently observed settle times of each readiness condition, e.g. how long a port takes to get in sync after a reset. The estimate is used by :func:`wait_until` as the first poll delay, so that the polling adapts to the equipment instead of using fixed sleeps. A tracker belongs to one tester session (see ``PortLeaseManager.settle_times``).
+    """
+    def __init__(self, history: int = 16):
+        self.history = history
+        self.database: Dict[str, Deque[float]] = {}
+
+    def record(self, key: str, seconds: float) -> None:
+        if key not in self.database:
+            self.database[key] = deque(maxlen=self.history)
+        self.database[key].append(seconds)
+
+    def estimate(self, key: str) -> Optional[float]:
+        """Median of the recent settle times of the condition, or None if it has never been observed.
+        """
+        if key not in self.database or len(self.database[key]) == 0:
+            return None
+        _sorted = sorted(self.database[key])
+        return _sorted[len(_sorted)//2]
+
+# *************************************************************************************
+# func: wait_until
+# description: Poll a readiness condition with exponential backoff until it is met
+# or the timeout expires
+# *************************************************************************************
+async def wait_until(key: str, probe: Callable[[], Awaitable[bool]], timeout: float = 10.0, initial_delay: float = 0.05, max_delay: float = 1.0, logger_name: str = "", tracker: Optional[SettleTimeTracker] = None) -> bool:
+    """Poll a readiness condition until it is met or the timeout expires.
+
+    The condition is probed immediately. If it is not met, the first delay is the learned settle time of the condition (if any), then the delay starts at ``initial_delay`` and doubles up to ``max_delay``. The observed settle time is recorded in the tracker when the condition is met. Without a tracker, the settle time is not learned.
+
+    :param key: name of the condition, used to learn its settle time
+    :type key: str
+    :param probe: coroutine function returning True when the condition is met
+    :type probe: Callable[[], Awaitable[bool]]
+    :param timeout: timeout in seconds, defaults to 10.0
+    :type timeout: float, optional
+    :param initial_delay: first backoff delay in seconds, defaults to 0.05
+    :type initial_delay: float, optional
+    :param max_delay: maximum backoff delay in seconds, defaults to 1.0
+    :type max_delay: float, optional
+    :param logger_name: logger name, defaults to ""
+    :type logger_name: str, optional
+    :param tracker: settle time tracker of the session, defaults to None
+    :type tracker: Optional[SettleTimeTracker], optional
+    :return: True if the condition is met, False on timeout
+    :rtype: bool
+    """
+    logger = logging.getLogger(logger_name)
+    start_time = time.monotonic()
+    deadline = start_time + timeout
+    estimate = tracker.estimate(key) if tracker is not None else None
+    delay = estimate if estimate is not None and estimate > initial_delay else initial_delay
+    backoff = initial_delay
+    while True:
+        if await probe():
+            elapsed = time.monotonic() - start_time
+            if tracker is not None:
+                tracker.record(key, elapsed)
+            logger.debug(f"  Ready: {key} ({elapsed:.3f}s)")
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            logger.warning(f"  Not ready after {timeout}s: {key}")
+            return False
+        await asyncio.sleep(min(delay, remaining))
+        delay = backoff
+        backoff = min(backoff*2, max_delay)
@@ -4,36 +4,139 @@
 
 import time
 import csv
+import json
+import os
+import tempfile
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-class PRBSReportGenerator:
-    def __init__(self):
-        self.name = "PRBS Test"
+def calc_prbs_ber(bits: int, errors: int) -> Optional[float]:
+    """PRBS BER, or its 99% confidence upper bound 4.6/bits if there is no error. None if no bit is received.
+    """
+    if bits == 0:
+        return None
+    if errors == 0:
+        return abs(4.6/bits)
+    return abs(errors/bits)
+
+def format_ber(ber: Optional[float]) -> str:
+    return "N/A" if ber is None else '{:.2e}'.format(ber)
+
+def report_journal_filename(report_filename: str, test: str) -> str:
+    """Journal file of a test report, next to the CSV report. The start time is part of the name, so that the journal of an interrupted run is never overwritten.
+    """
+    return f"{report_filename}.{test}.{time.strftime('%Y%m%d-%H%M%S', time.localtime())}.journal"
+
+# *************************************************************************************
+# class: ReportJournal
+# description: Append-only journal of the rows of a report, written as they are recorded
+# *************************************************************************************
+class ReportJournal:
+    """Append-only journal of the rows of a report. Each row is a JSON line ``[section, row]``, where the section is the port (or lane) name the row belongs to.
+
+    Rows are buffered up to ``buffer_size`` rows, then written and flushed to the OS. Every ``checkpoint_interval`` seconds the file is also fsync'ed, so an interrupted run keeps all the rows up to the last checkpoint on disk.
+    """
+    def __init__(self, filename: str, buffer_size: int = 64, checkpoint_interval: float = 10.0):
+        self.filename = filename
+        self.buffer_size = buffer_size
+        self.checkpoint_interval = checkpoint_interval
+        self.buffer: List[str] = []
+        self.file = None
+        self.last_checkpoint = time.monotonic()
+
+    def append(self, section: str, row: Any) -> None:
+        self.buffer.append(json.dumps([section, row], default=str))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+        if time.monotonic() - self.last_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+
+    def flush(self) -> None:
+        """Write the buffered rows to the journal file.
+        """
+        if self.file is None:
+            self.file = open(self.filename, 'a')
+        if self.buffer:
+            self.file.write("\n".join(self.buffer) + "\n")
+            self.buffer.clear()
+        self.file.flush()
+
+    def checkpoint(self) -> None:
+        """Write the buffered rows and fsync the journal file.
+        """
+        self.flush()
+        os.fsync(self.file.fileno())
+        self.last_checkpoint = time.monotonic()
+
+    def sections(self) -> Iterator[Tuple[str, Iterator[Any]]]:
+        """Read the journal back, section by section in the order the sections were first recorded. The rows of each section are spooled to a temporary file in a single pass over the journal, so memory usage does not grow with the size of the journal. The rows of a section must be consumed before moving to the next section.
+        """
+        self.checkpoint()
+        spools: Dict[str, Any] = {}
+        try:
+            with open(self.filename, 'r') as journal:
+                for line in journal:
+                    if not line.strip():
+                        continue
+                    section, row = json.loads(line)
+                    if section not in spools:
+                        spools[section] = tempfile.SpooledTemporaryFile(max_size=1<<20, mode='w+')
+                    spools[section].write(json.dumps(row) + "\n")
+            for section, spool in spools.items():
+                spool.seek(0)
+                yield section, (json.loads(line) for line in spool)
+        finally:
+            for spool in spools.values():
+                spool.close()
+
+    def close(self, remove: bool = False) -> None:
+        """Close the journal file, and remove it if the report has been generated.
+        """
+        if self.file is not None:
+            self.checkpoint()
+            self.file.close()
+            self.file = None
+        if remove and os.path.exists(self.filename):
+            os.remove(self.filename)
+
+# *************************************************************************************
+# class: ReportGenerator
+# description: Base of the report generators
+# *************************************************************************************
+class ReportGenerator:
+    """Base of the report generators. The rows of a report are grouped in sections, one per port (or lane).
+
+    If ``journal_filename`` is given, the rows are streamed to a :class:`ReportJournal` as they are recorded instead of being held in memory, and :meth:`generate_report` assembles the report from the journal. The journal is removed once the report is generated, and is left on disk if the test is interrupted.
+    """
+    def __init__(self, name: str, fieldnames: List[str], journal_filename: Optional[str] = None):
+        self.name = name
         self.chassis = "10.10.10.10"
-        self.fieldnames = ["Time", "PRBS Lock", "PRBS Bits", "PRBS Errors", "PRBS BER"]
+        self.fieldnames = fieldnames
         self.datetime = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-        self.database = {}
+        self.database: Dict[str, Any] = {}
+        self.journal = ReportJournal(journal_filename) if journal_filename is not None else None
 
-    def record_data(self, port_name: str, prbs_lock: str, prbs_bits: int, prbs_errors: int) -> None:
-        time_str = time.strftime("%H:%M:%S", time.localtime())
+    def add_row(self, port_name: str, data: Dict[str, Any]) -> None:
+        if self.journal is not None:
+            self.journal.append(port_name, data)
+            return
         if port_name not in self.database:
             self.database[port_name] = []
-        if prbs_errors == 0:
-            self.database[port_name].append({
-                "Time": time_str,
-                "PRBS Lock": prbs_lock,
-                "PRBS Bits": prbs_bits,
-                "PRBS Errors": prbs_errors,
-                "PRBS BER": '{:.2e}'.format(abs(4.6/prbs_bits))
-            })
+        self.database[port_name].append(data)
+
+    def sections(self) -> Iterator[Tuple[str, Iterator[Any]]]:
+        if self.journal is not None:
+            yield from self.journal.sections()
         else:
-            self.database[port_name].append({
-                "Time": time_str,
-                "PRBS Lock": prbs_lock,
-                "PRBS Bits": prbs_bits,
-                "PRBS Errors": prbs_errors,
-                "PRBS BER": '{:.2e}'.format(abs(prbs_errors/prbs_bits))
-            })
-    
+            for key, value in self.database.items():
+                yield key, iter(value)
+
+    def write_section(self, csvfile, key: str, rows: Iterator[Any]) -> None:
+        dict_writer = csv.DictWriter(csvfile, fieldnames=self.fieldnames)
+        dict_writer.writeheader()
+        for data in rows:
+            dict_writer.writerow(data)
+
     def generate_report(self, filename: str) -> None:
         headers = [
             ["*******************************************"],
@@ -46,102 +149,110 @@ class PRBSReportGenerator:
             writer = csv.writer(csvfile)
             for line in headers:
                 writer.writerow(line)
-            for key, value in self.database.items():
+            for key, rows in self.sections():
                 writer.writerow([key])
-                dict_writer = csv.DictWriter(csvfile, fieldnames=self.fieldnames)
-                dict_writer.writeheader()
-                for data in value:
-                    dict_writer.writerow(data)
+                self.write_section(csvfile, key, rows)
                 writer.writerow([])
+        if self.journal is not None:
+            self.journal.close(remove=True)
 
-class FECReportGenerator:
-    def __init__(self):
-        self.name = "FEC BER Test"
-        self.chassis = "10.10.10.10"
-        self.fieldnames = ["Time", "Pre-FEC BER", "Post-FEC BER"]
-        self.datetime = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-        self.database = {}
+class PRBSLaneSamples:
+    """Samples of a PRBS lane, stored column by column in typed arrays, with running aggregates of the BER. If ``keep_samples`` is False (the samples are in the report journal), only the aggregates are kept.
+    """
+    def __init__(self, keep_samples: bool = True):
+        self.keep_samples = keep_samples
+        self.timestamps = array("d")
+        self.bits = array("Q")
+        self.errors = array("Q")
+        self.lock = array("B")
+        self.min_ber: Optional[float] = None
+        self.max_ber: Optional[float] = None
+        self.final_ber: Optional[float] = None
+
+    def append(self, timestamp: float, lock: int, bits: int, errors: int) -> None:
+        if self.keep_samples:
+            self.timestamps.append(timestamp)
+            self.lock.append(lock)
+            self.bits.append(bits)
+            self.errors.append(errors)
+        ber = calc_prbs_ber(bits, errors)
+        if ber is not None:
+            self.min_ber = ber if self.min_ber is None else min(self.min_ber, ber)
+            self.max_ber = ber if self.max_ber is None else max(self.max_ber, ber)
+        self.final_ber = ber
+
+class PRBSReportGenerator(ReportGenerator):
+    def __init__(self, journal_filename: Optional[str] = None):
+        super().__init__("PRBS Test", ["Time", "PRBS Lock", "PRBS Bits", "PRBS Errors", "PRBS BER"], journal_filename)
+        self.database: Dict[str, PRBSLaneSamples] = {}
+        self.lock_names: List[str] = []
+        self.verdicts = {}
+
+    def record_data(self, port_name: str, prbs_lock: str, prbs_bits: int, prbs_errors: int) -> None:
+        if port_name not in self.database:
+            self.database[port_name] = PRBSLaneSamples(keep_samples=self.journal is None)
+        if prbs_lock not in self.lock_names:
+            self.lock_names.append(prbs_lock)
+        timestamp = time.time()
+        self.database[port_name].append(timestamp, self.lock_names.index(prbs_lock), prbs_bits, prbs_errors)
+        if self.journal is not None:
+            self.journal.append(port_name, [timestamp, prbs_lock, prbs_bits, prbs_errors])
+
+    def record_verdict(self, port_name: str, verdict: str) -> None:
+        self.verdicts[port_name] = verdict
+
+    def sections(self) -> Iterator[Tuple[str, Iterator[Any]]]:
+        if self.journal is not None:
+            yield from self.journal.sections()
+        else:
+            for key, value in self.database.items():
+                yield key, zip(value.timestamps, (self.lock_names[x] for x in value.lock), value.bits, value.errors)
+
+    def write_section(self, csvfile, key: str, rows: Iterator[Any]) -> None:
+        writer = csv.writer(csvfile)
+        writer.writerow(self.fieldnames)
+        for timestamp, lock, bits, errors in rows:
+            writer.writerow([
+                time.strftime("%H:%M:%S", time.localtime(timestamp)),
+                lock,
+                bits,
+                errors,
+                format_ber(calc_prbs_ber(bits, errors)),
+            ])
+        value = self.database[key]
+        writer.writerow(["Min BER:", format_ber(value.min_ber), "Max BER:", format_ber(value.max_ber), "Final BER:", format_ber(value.final_ber)])
+        if key in self.verdicts:
+            writer.writerow(["Verdict:", self.verdicts[key]])
+
+class FECReportGenerator(ReportGenerator):
+    def __init__(self, journal_filename: Optional[str] = None):
+        super().__init__("FEC BER Test", ["Time", "Pre-FEC BER", "Post-FEC BER"], journal_filename)
 
     def record_data(self, port_name: str, pre_fec_ber: str, post_fec_ber: str) -> None:
         time_str = time.strftime("%H:%M:%S", time.localtime())
-        if port_name not in self.database:
-            self.database[port_name] = []
-        self.database[port_name].append({
+        self.add_row(port_name, {
             "Time": time_str,
             "Pre-FEC BER": pre_fec_ber,
             "Post-FEC BER": post_fec_ber,
         })
-        
-    
-    def generate_report(self, filename: str) -> None:
-        headers = [
-            ["*******************************************"],
-            ["Test:", self.name],
-            ["Chassis:", self.chassis],
-            ["Datetime:", self.datetime],
-            []
-        ]
-        with open(filename, 'a', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            for line in headers:
-                writer.writerow(line)
-            for key, value in self.database.items():
-                writer.writerow([key])
-                dict_writer = csv.DictWriter(csvfile, fieldnames=self.fieldnames)
-                dict_writer.writeheader()
-                for data in value:
-                    dict_writer.writerow(data)
-                writer.writerow([])
 
-class TransceiverReportGenerator:
-    def __init__(self):
-        self.name = "Transceiver Info"
-        self.chassis = "10.10.10.10"
-        self.fieldnames = ["Description", "ASCII Value", "Raw Value"]
-        self.datetime = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-        self.database = {}
+class TransceiverReportGenerator(ReportGenerator):
+    def __init__(self, journal_filename: Optional[str] = None):
+        super().__init__("Transceiver Info", ["Description", "ASCII Value", "Raw Value"], journal_filename)
 
     def record_data(self, port_name: str, description: str, ascii_value: str, raw_value: str) -> None:
-        if port_name not in self.database:
-            self.database[port_name] = []
-        self.database[port_name].append({
+        self.add_row(port_name, {
             "Description": description,
             "ASCII Value": ascii_value,
             "Raw Value": raw_value,
         })
-        
-    def generate_report(self, filename: str) -> None:
-        headers = [
-            ["*******************************************"],
-            ["Test:", self.name],
-            ["Chassis:", self.chassis],
-            ["Datetime:", self.datetime],
-            []
-        ]
-        with open(filename, 'a', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            for line in headers:
-                writer.writerow(line)
-            for key, value in self.database.items():
-                writer.writerow([key])
-                dict_writer = csv.DictWriter(csvfile, fieldnames=self.fieldnames)
-                dict_writer.writeheader()
-                for data in value:
-                    dict_writer.writerow(data)
-                writer.writerow([])
 
-class LatencyFrameLossReportGenerator:
-    def __init__(self):
-        self.name = "Latency and Frame Loss Test"
-        self.chassis = "10.10.10.10"
-        self.fieldnames = ["Description", "Rate (%)", "Packet Size (bytes)", "Frame Loss", "Latency (ns)", "Jitter (ns)"]
-        self.datetime = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-        self.database = {}
+class LatencyFrameLossReportGenerator(ReportGenerator):
+    def __init__(self, journal_filename: Optional[str] = None):
+        super().__init__("Latency and Frame Loss Test", ["Description", "Rate (%)", "Packet Size (bytes)", "Frame Loss", "Latency (ns)", "Jitter (ns)"], journal_filename)
 
     def record_data(self, port_name: str, description: str, traffic_rate: float, packet_size: int, frame_loss: int, latency: int, jitter: int) -> None:
-        if port_name not in self.database:
-            self.database[port_name] = []
-        self.database[port_name].append({
+        self.add_row(port_name, {
             "Description": description,
             "Rate (%)": traffic_rate,
             "Packet Size (bytes)": packet_size,
@@ -149,41 +260,50 @@ class LatencyFrameLossReportGenerator:
             "Latency (ns)": latency,
             "Jitter (ns)": jitter,
         })
-        
-    
-    def generate_report(self, filename: str) -> None:
-        headers = [
-            ["*******************************************"],
-            ["Test:", self.name],
-            ["Chassis:", self.chassis],
-            ["Datetime:", self.datetime],
-            []
-        ]
-        with open(filename, 'a', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            for line in headers:
-                writer.writerow(line)
-            for key, value in self.database.items():
-                writer.writerow([key])
-                dict_writer = csv.DictWriter(csvfile, fieldnames=self.fieldnames)
-                dict_writer.writeheader()
-                for data in value:
-                    dict_writer.writerow(data)
-                writer.writerow([])
 
-class HostTxTapReportGenerator:
-    def __init__(self):
-        self.name = "Host Side TX EQ Informaton"
-        self.chassis = "10.10.10.10"
-        self.fieldnames = ["Lane", "Pre3 (dB)", "Pre2 (dB)", "Pre (dB)", "Main (mV)", "Post (dB)"]
-        self.datetime = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-        self.database = {}
+class ThroughputReportGenerator(ReportGenerator):
+    def __init__(self, journal_filename: Optional[str] = None):
+        super().__init__("Throughput Test (RFC 2544)", ["Description", "Packet Size (bytes)", "Throughput (%)", "Trials", "Latency (ns)", "Jitter (ns)"], journal_filename)
+
+    def record_data(self, port_name: str, description: str, packet_size: int, throughput: Optional[float], trials: int, latency: Optional[int], jitter: Optional[int]) -> None:
+        self.add_row(port_name, {
+            "Description": description,
+            "Packet Size (bytes)": packet_size,
+            "Throughput (%)": "N/A" if throughput is None else throughput,
+            "Trials": trials,
+            "Latency (ns)": "N/A" if latency is None else latency,
+            "Jitter (ns)": "N/A" if jitter is None else jitter,
+        })
+
+class SIVMetricsReportGenerator(ReportGenerator):
+    def __init__(self, journal_filename: Optional[str] = None):
+        super().__init__("Signal Integrity Metrics", [
+            "Lane",
+            "L0 Mean", "L1 Mean", "L2 Mean", "L3 Mean",
+            "L0 Std", "L1 Std", "L2 Std", "L3 Std",
+            "RLM",
+            "Lower Eye SNR (dB)", "Middle Eye SNR (dB)", "Upper Eye SNR (dB)",
+            "Lower Slicer Margin", "Middle Slicer Margin", "Upper Slicer Margin",
+            ], journal_filename)
+
+    def record_data(self, port_name: str, lane: int, metrics: Dict[str, Any]) -> None:
+        def _format(value: Optional[float]) -> str:
+            return "N/A" if value is None else '{:.3f}'.format(value)
+        data = {"Lane": lane, "RLM": _format(metrics["rlm"])}
+        for k in range(4):
+            data[f"L{k} Mean"] = _format(metrics["mean"][k])
+            data[f"L{k} Std"] = _format(metrics["std"][k])
+        for k, eye in enumerate(["Lower", "Middle", "Upper"]):
+            data[f"{eye} Eye SNR (dB)"] = _format(metrics["snr"][k])
+            data[f"{eye} Slicer Margin"] = _format(metrics["margin"][k])
+        self.add_row(port_name, data)
+
+class HostTxTapReportGenerator(ReportGenerator):
+    def __init__(self, journal_filename: Optional[str] = None):
+        super().__init__("Host Side TX EQ Informaton", ["Lane", "Pre3 (dB)", "Pre2 (dB)", "Pre (dB)", "Main (mV)", "Post (dB)"], journal_filename)
 
     def record_data(self, port_name: str, lane: int, pre3_db: float, pre2_db: float, pre_db: float, main_mv: int, post_db: float) -> None:
-        time_str = time.strftime("%H:%M:%S", time.localtime())
-        if port_name not in self.database:
-            self.database[port_name] = []
-        self.database[port_name].append({
+        self.add_row(port_name, {
             "Lane": lane,
             "Pre3 (dB)": pre3_db,
             "Pre2 (dB)": pre2_db,
@@ -191,63 +311,15 @@ class HostTxTapReportGenerator:
             "Main (mV)": main_mv,
             "Post (dB)": post_db,
         })
-    
-    def generate_report(self, filename: str) -> None:
-        headers = [
-            ["*******************************************"],
-            ["Test:", self.name],
-            ["Chassis:", self.chassis],
-            ["Datetime:", self.datetime],
-            []
-        ]
-        with open(filename, 'a', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            for line in headers:
-                writer.writerow(line)
-            for key, value in self.database.items():
-                writer.writerow([key])
-                dict_writer = csv.DictWriter(csvfile, fieldnames=self.fieldnames)
-                dict_writer.writeheader()
-                for data in value:
-                    dict_writer.writerow(data)
-                writer.writerow([])
 
-
-class ModuleTxTapReportGenerator:
-    def __init__(self):
-        self.name = "Module Side TX EQ Informaton"
-        self.chassis = "10.10.10.10"
-        self.fieldnames = ["Lane", "Pre (dB)", "Main (dB)", "Post (dB)"]
-        self.datetime = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-        self.database = {}
+class ModuleTxTapReportGenerator(ReportGenerator):
+    def __init__(self, journal_filename: Optional[str] = None):
+        super().__init__("Module Side TX EQ Informaton", ["Lane", "Pre (dB)", "Main (dB)", "Post (dB)"], journal_filename)
 
     def record_data(self, port_name: str, lane: int, pre_db: float, main_db: float, post_db: float) -> None:
-        time_str = time.strftime("%H:%M:%S", time.localtime())
-        if port_name not in self.database:
-            self.database[port_name] = []
-        self.database[port_name].append({
+        self.add_row(port_name, {
             "Lane": lane,
             "Pre (dB)": pre_db,
             "Main (dB)": main_db,
             "Post (dB)": post_db,
         })
-    
-    def generate_report(self, filename: str) -> None:
-        headers = [
-            ["*******************************************"],
-            ["Test:", self.name],
-            ["Chassis:", self.chassis],
-            ["Datetime:", self.datetime],
-            []
-        ]
-        with open(filename, 'a', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            for line in headers:
-                writer.writerow(line)
-            for key, value in self.database.items():
-                writer.writerow([key])
-                dict_writer = csv.DictWriter(csvfile, fieldnames=self.fieldnames)
-                dict_writer.writeheader()
-                for data in value:
-                    dict_writer.writerow(data)
-                writer.writerow([])
\ No newline at end of file
@@ -0,0 +1,64 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterator
+
+# *************************************************************************************
+# class: DeadlineSampler
+# description: Sampling clock that ticks on fixed deadlines from the start time
+# *************************************************************************************
+class DeadlineSampler:
+    """Sampling clock for the statistics polling of the PRBS and FEC tests.
+
+    Tick ``n`` is due at ``start + n*interval``, so the processing time of a tick does not delay the following ones and the test ends after ``duration``. If a tick is processed so late that later deadlines have already passed, those ticks are skipped and counted as missed, and the sampling goes on with the latest due tick. The last tick is never skipped.
+
+    Usage::
+
+        sampler = DeadlineSampler(interval=1.0, duration=10, logger_name=logger_name)
+        async for tick in sampler.ticks():
+            ...
+        sampler.log_summary()
+    """
+    def __init__(self, interval: float, duration: float, logger_name: str):
+        assert interval > 0
+        self.interval = interval
+        self.tick_count = max(1, int(round(duration/interval)))
+        self.logger_name = logger_name
+        self.start_time = 0.0
+        self.missed_ticks = 0
+        self.sampled_ticks = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+
+    async def ticks(self) -> AsyncIterator[int]:
+        """Wait for each tick deadline and yield the tick number, from 1 to ``tick_count``.
+        """
+        logger = logging.getLogger(self.logger_name)
+        self.start_time = time.monotonic()
+        tick = 1
+        while tick <= self.tick_count:
+            deadline = self.start_time + tick*self.interval
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            lateness = max(0.0, time.monotonic() - deadline)
+            self.sampled_ticks += 1
+            self.total_lateness += lateness
+            self.max_lateness = max(self.max_lateness, lateness)
+            yield tick
+
+            # Skip the ticks whose deadlines passed while this tick was processed
+            next_tick = tick + 1
+            due_tick = min(int((time.monotonic() - self.start_time)/self.interval), self.tick_count)
+            if due_tick > next_tick:
+                logger.warning(f"  Sampling is behind, {due_tick - next_tick} ticks missed after tick {tick}")
+                self.missed_ticks += due_tick - next_tick
+                next_tick = due_tick
+            tick = next_tick
+
+    def log_summary(self) -> None:
+        """Log the number of sampled and missed ticks, and the mean and max lateness of the ticks (jitter).
+        """
+        logger = logging.getLogger(self.logger_name)
+        mean_lateness = self.total_lateness/self.sampled_ticks if self.sampled_ticks else 0.0
+        logger.info(f"  Sampling: {self.sampled_ticks}/{self.tick_count} ticks, {self.missed_ticks} missed, interval {self.interval}s, jitter mean {mean_lateness*1000:.1f} ms, max {self.max_lateness*1000:.1f} ms")
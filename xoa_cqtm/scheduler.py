@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Iterable, List, Set
+from .enums import TestResource
+
+# *************************************************************************************
+# class: TestStep
+# description: A single step of the test sequence, together with the test resources
+# it reads and writes.
+# *************************************************************************************
+class TestStep:
+    """A single step of the test sequence. A step reads and/or writes a set of test resources, which is used by the scheduler to work out the dependencies between steps.
+    """
+    def __init__(self, name: str, func: Callable[[], Awaitable[None]], reads: Iterable[TestResource] = (), writes: Iterable[TestResource] = ()):
+        self.name = name
+        self.func = func
+        self.reads: Set[TestResource] = set(reads)
+        self.writes: Set[TestResource] = set(writes)
+        self.depends_on: List["TestStep"] = []
+
+    def conflicts_with(self, other: "TestStep") -> bool:
+        """Check if two steps can not run at the same time, i.e. one of them writes a resource that the other one reads or writes.
+        """
+        if self.writes & (other.reads | other.writes):
+            return True
+        if other.writes & self.reads:
+            return True
+        return False
+
+# *************************************************************************************
+# class: StepScheduler
+# description: Run the test steps concurrently on the event loop. Steps are added in
+# program order, and a step only waits for the earlier steps it conflicts with.
+# *************************************************************************************
+class StepScheduler:
+    """Run the test steps concurrently on the event loop.
+
+    Steps are added in program order. A step waits for every earlier step it conflicts with (read-after-write, write-after-read and write-after-write on a test resource), and runs concurrently with all the others. If a step fails, the steps still running are cancelled and the exception is raised.
+
+    The order in which independent steps start and end is not fixed, so neither is the order of their log lines and report sections.
+    """
+    def __init__(self, logger_name: str):
+        self.logger_name = logger_name
+        self.steps: List[TestStep] = []
+
+    def add_step(self, name: str, func: Callable[[], Awaitable[None]], reads: Iterable[TestResource] = (), writes: Iterable[TestResource] = ()) -> TestStep:
+        """Add a step to the end of the test sequence.
+
+        :param name: unique name of the step
+        :type name: str
+        :param func: coroutine function that runs the step
+        :type func: Callable[[], Awaitable[None]]
+        :param reads: test resources the step depends on
+        :type reads: Iterable[TestResource]
+        :param writes: test resources the step changes
+        :type writes: Iterable[TestResource]
+        :return: the step
+        :rtype: TestStep
+        """
+        assert name not in [step.name for step in self.steps], f"Duplicated step name: {name}"
+        step = TestStep(name, func, reads, writes)
+        step.depends_on = [earlier for earlier in self.steps if step.conflicts_with(earlier)]
+        self.steps.append(step)
+        return step
+
+    async def run(self) -> None:
+        """Run all the steps. Each step starts as soon as all the steps it depends on are done.
+        """
+        logger = logging.getLogger(self.logger_name)
+        done: Set[str] = set()
+        pending: List[TestStep] = list(self.steps)
+        running = {}
+        start_time = time.monotonic()
+        try:
+            while pending or running:
+                for step in list(pending):
+                    if all(x.name in done for x in step.depends_on):
+                        pending.remove(step)
+                        logger.debug(f"Step started: {step.name}")
+                        running[asyncio.create_task(step.func())] = step
+                assert running, "Test steps have circular dependencies"
+                finished, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    step = running.pop(task)
+                    task.result()
+                    done.add(step.name)
+                    logger.debug(f"Step done: {step.name} ({time.monotonic()-start_time:.1f}s)")
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running.keys(), return_exceptions=True)
@@ -0,0 +1,346 @@
+import time
+import logging
+import numpy as np
+from xoa_driver import ports
+from xoa_driver import enums
+from xoa_driver import utils
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from .readiness import SettleTimeTracker, wait_until
+
+# Each SIV capture of a serdes lane is 6 level values followed by 2000 sample values,
+# all 16-bit signed, msb first.
+SIV_LEVEL_COUNT = 6
+SIV_SAMPLE_COUNT = 2000
+SIV_DTYPE = np.dtype(">i2")
+
+# SIV histogram has one bin per sample value from -64 to 63
+SIV_HISTOGRAM_MIN = -64
+SIV_HISTOGRAM_BINS = 128
+
+# *************************************************************************************
+# func: decode_siv_data
+# description: Decode the SIV data of a serdes lane into level and sample arrays
+# *************************************************************************************
+def decode_siv_data(value: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Decode the SIV data of a serdes lane, as returned by ``siv.data.get()``, into level and sample arrays.
+
+    The 6 levels are <p1> <p2> <p3> <m1> <m2> <m3>, i.e. 4 average PAM4 levels and 2 slicers. Only the first slicer data is used.
+
+    :param value: raw SIV data bytes
+    :type value: Sequence[int]
+    :return: levels (6 values) and samples (2000 values), both int16
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+    data = np.frombuffer(bytes(value), dtype=SIV_DTYPE).astype(np.int16)
+    return data[:SIV_LEVEL_COUNT], data[SIV_LEVEL_COUNT:SIV_LEVEL_COUNT+SIV_SAMPLE_COUNT]
+
+# *************************************************************************************
+# class: SIVHistogram
+# description: Fixed 128-bin histogram of the SIV samples of a serdes lane, updated
+# incrementally
+# *************************************************************************************
+class SIVHistogram:
+    """Fixed 128-bin histogram of the SIV samples of a serdes lane, one bin per sample value from -64 to 63. The counts are updated with the new samples only, so the cost of an update does not depend on how many samples are already counted. Samples out of the range are not counted.
+    """
+    def __init__(self):
+        self.counts = np.zeros(SIV_HISTOGRAM_BINS, dtype=np.int64)
+        self.out_of_range = 0
+
+    def _bincount(self, samples: np.ndarray) -> Tuple[np.ndarray, int]:
+        index = samples.astype(np.int64) - SIV_HISTOGRAM_MIN
+        in_range = (index >= 0) & (index < SIV_HISTOGRAM_BINS)
+        return np.bincount(index[in_range], minlength=SIV_HISTOGRAM_BINS), int(index.size - np.count_nonzero(in_range))
+
+    def add(self, samples: np.ndarray) -> None:
+        """Count new samples.
+
+        :param samples: SIV samples
+        :type samples: np.ndarray
+        """
+        counts, out_of_range = self._bincount(samples)
+        self.counts += counts
+        self.out_of_range += out_of_range
+
+    def remove(self, samples: np.ndarray) -> None:
+        """Uncount samples that were counted before, e.g. when they are dropped from a ring buffer.
+
+        :param samples: SIV samples
+        :type samples: np.ndarray
+        """
+        counts, out_of_range = self._bincount(samples)
+        self.counts -= counts
+        self.out_of_range -= out_of_range
+
+    @staticmethod
+    def bin_edges() -> np.ndarray:
+        """Bin edges of the histogram, from -64 to 64, each bin covering one sample value.
+        """
+        return np.arange(SIV_HISTOGRAM_MIN, SIV_HISTOGRAM_MIN + SIV_HISTOGRAM_BINS + 1)
+
+# *************************************************************************************
+# class: SIVSampleBuffer
+# description: Preallocated ring buffer of the SIV captures of a serdes lane
+# *************************************************************************************
+class SIVSampleBuffer:
+    """Preallocated ring buffer of the SIV captures of a serdes lane. It keeps the samples and the levels of the last ``depth`` captures in int16 arrays. When the buffer is full, the oldest capture is overwritten. The histogram of the samples in the buffer is kept up to date on each capture.
+    """
+    def __init__(self, depth: int):
+        assert depth >= 1
+        self.depth = depth
+        self.samples = np.zeros((depth, SIV_SAMPLE_COUNT), dtype=np.int16)
+        self.levels = np.zeros((depth, SIV_LEVEL_COUNT), dtype=np.int16)
+        self.capture_count = 0
+        self.histogram = SIVHistogram()
+
+    def append(self, levels: np.ndarray, samples: np.ndarray) -> None:
+        """Add a capture to the buffer.
+
+        :param levels: the 6 levels of the capture
+        :type levels: np.ndarray
+        :param samples: the 2000 samples of the capture
+        :type samples: np.ndarray
+        """
+        slot = self.capture_count % self.depth
+        if self.capture_count >= self.depth:
+            self.histogram.remove(self.samples[slot])
+        self.histogram.add(samples)
+        self.levels[slot] = levels
+        self.samples[slot] = samples
+        self.capture_count += 1
+
+    @property
+    def size(self) -> int:
+        """Number of captures in the buffer
+        """
+        return min(self.capture_count, self.depth)
+
+    def ordered_slots(self) -> np.ndarray:
+        """Slot indices of the captures in the buffer, from the oldest to the newest.
+        """
+        if self.capture_count <= self.depth:
+            return np.arange(self.capture_count)
+        return (np.arange(self.depth) + self.capture_count) % self.depth
+
+    def ordered_samples(self) -> np.ndarray:
+        """All samples in the buffer as one array, from the oldest to the newest capture.
+        """
+        return self.samples[self.ordered_slots()].reshape(-1)
+
+    def latest_levels(self) -> np.ndarray:
+        """Levels of the newest capture.
+        """
+        assert self.capture_count > 0
+        return self.levels[(self.capture_count - 1) % self.depth]
+
+# *************************************************************************************
+# func: poll_siv_data
+# description: Poll the SIV data of the serdes lanes until all lanes have data
+# *************************************************************************************
+async def poll_siv_data(port_obj: ports.Z800FreyaPort, lanes: List[int], timeout: float, logger_name: str, tracker: Optional[SettleTimeTracker] = None) -> Tuple[Dict[int, Any], Dict[int, float]]:
+    """Poll the SIV data of the serdes lanes after a scan is started, until all lanes have data or the timeout expires. Each poll only queries the lanes that have no data yet, and the polls back off exponentially so the management connection is not flooded.
+
+    :param port_obj: port object
+    :type port_obj: ports.Z800FreyaPort
+    :param lanes: serdes lanes to poll
+    :type lanes: List[int]
+    :param timeout: timeout in seconds
+    :type timeout: float
+    :param logger_name: logger name
+    :type logger_name: str
+    :param tracker: settle time tracker of the session, defaults to None
+    :type tracker: Optional[SettleTimeTracker], optional
+    :return: the SIV data response and the time-to-data in seconds of each lane that has data
+    :rtype: Tuple[Dict[int, Any], Dict[int, float]]
+    """
+    pending = list(lanes)
+    resp_dict: Dict[int, Any] = {}
+    time_to_data: Dict[int, float] = {}
+    start_time = time.monotonic()
+
+    async def _all_lanes_ready() -> bool:
+        resps = await utils.apply(*[port_obj.l1.serdes[lane].medium.siv.data.get() for lane in pending])
+        elapsed = time.monotonic() - start_time
+        for lane, resp in zip(list(pending), resps):
+            if resp.result != 0:
+                resp_dict[lane] = resp
+                time_to_data[lane] = elapsed
+                pending.remove(lane)
+        return len(pending) == 0
+
+    await wait_until("siv_data", _all_lanes_ready, timeout=timeout, initial_delay=0.01, max_delay=0.5, logger_name=logger_name, tracker=tracker)
+    return resp_dict, time_to_data
+
+# *************************************************************************************
+# func: capture_siv_data
+# description: Capture the SIV data of all serdes lanes of a port into sample buffers
+# *************************************************************************************
+async def capture_siv_data(port_obj: ports.Z800FreyaPort, captures: int, depth: int, logger_name: str, tracker: Optional[SettleTimeTracker] = None) -> Tuple[List[int], List[SIVSampleBuffer]]:
+    """Capture the SIV data of all serdes lanes of a port. For each capture, the scan is started on all lanes, then the lanes are polled until they have data. A capture is skipped if some lanes have no data in time. Each lane keeps the last ``depth`` captures in its sample buffer, the older ones are dropped.
+
+    :param port_obj: port object
+    :type port_obj: ports.Z800FreyaPort
+    :param captures: number of captures per lane
+    :type captures: int
+    :param depth: number of captures kept in the sample buffer of each lane
+    :type depth: int
+    :param logger_name: logger name
+    :type logger_name: str
+    :param tracker: settle time tracker of the session, defaults to None
+    :type tracker: Optional[SettleTimeTracker], optional
+    :return: the serdes lanes and the sample buffer of each lane
+    :rtype: Tuple[List[int], List[SIVSampleBuffer]]
+    """
+    logger = logging.getLogger(logger_name)
+
+    # Read number of serdes lanes
+    resp = await port_obj.capabilities.get()
+    # Show all lanes
+    lanes_to_show = resp.serdes_count
+    lanes = [i for i in range(lanes_to_show)]
+
+    # ring buffer for each serdes lane, keeping the last depth*2000 samples
+    sample_buffers = [SIVSampleBuffer(depth=depth) for _ in range(lanes_to_show)]
+
+    # group control commands for each serdes lane together to later send it as a command group.
+    control_cmd_group = []
+    for i in range(lanes_to_show):
+        control_cmd_group.append(port_obj.l1.serdes[lanes[i]].medium.siv.control.set(opcode=enums.Layer1Opcode.START_SCAN))
+
+    for capture in range(captures):
+        # start the scan on all lanes, then poll only the lanes that have no data yet
+        await utils.apply(*control_cmd_group)
+        resp_dict, time_to_data = await poll_siv_data(port_obj, lanes, timeout=5.0, logger_name=logger_name, tracker=tracker)
+        for lane in lanes:
+            if lane in time_to_data:
+                logger.info(f"  Port {port_obj.kind.module_id}/{port_obj.kind.port_id} Lane {lane}: SIV capture {capture+1}/{captures} time-to-data {time_to_data[lane]*1000:.1f} ms")
+        if len(resp_dict) < lanes_to_show:
+            logger.warning(f"  Port {port_obj.kind.module_id}/{port_obj.kind.port_id}: SIV data not ready on lanes {[lane for lane in lanes if lane not in resp_dict]}, capture skipped")
+            continue
+
+        for i in range(lanes_to_show):
+            # convert from 4012 raw bytes into 6 signed int levels and 2000 signed int values
+            # Please note: only the first slicer data is used here.
+            siv_int_levels, siv_int_values = decode_siv_data(resp_dict[lanes[i]].value)
+            sample_buffers[i].append(siv_int_levels, siv_int_values)
+
+    return lanes, sample_buffers
+
+# *************************************************************************************
+# func: siv_slicers_valid
+# description: Check that the SIV slicers of a serdes lane are in increasing order
+# *************************************************************************************
+def siv_slicers_valid(levels: np.ndarray) -> bool:
+    """Check that the slicers of a serdes lane are in increasing order, <m2> < 0 < <p2>. The samples can not be split into the PAM4 levels otherwise, e.g. when the lane has no signal.
+
+    :param levels: SIV levels of the lane, (<p1> <p2> <p3> <m1> <m2> <m3>)
+    :type levels: np.ndarray
+    :rtype: bool
+    """
+    return int(levels[4]) < 0 < int(levels[1])
+
+# *************************************************************************************
+# func: compute_pam4_metrics
+# description: Compute the PAM4 eye metrics of a serdes lane from its SIV data
+# *************************************************************************************
+def compute_pam4_metrics(samples: np.ndarray, levels: np.ndarray) -> Dict[str, Any]:
+    """Compute the PAM4 eye metrics of a serdes lane from its SIV samples and levels.
+
+    The samples are split into the 4 PAM4 levels by the 3 slicers: <m2>, 0 and <p2>. For each level, the mean and the standard deviation are computed. From them:
+
+    * ``rlm``: level separation mismatch ratio, min(3*ES1, 3*ES2, 2-3*ES1, 2-3*ES2), 1.0 for evenly spaced levels.
+    * ``snr``: SNR of the lower, middle and upper eye in dB, 20*log10((mean[k+1]-mean[k])/(std[k]+std[k+1])).
+    * ``margin``: margin of the lower, middle and upper slicer, the distance from the slicer to the nearer adjacent level mean.
+
+    Values that can not be computed, e.g. because a level has no samples, are None. All values are None if the slicers are not in increasing order (see :func:`siv_slicers_valid`).
+
+    :param samples: SIV samples of the lane
+    :type samples: np.ndarray
+    :param levels: SIV levels of the lane, (<p1> <p2> <p3> <m1> <m2> <m3>)
+    :type levels: np.ndarray
+    :return: metrics of the lane, keys are ``mean``, ``std`` (4 values each, from level 0 to level 3), ``rlm``, ``snr`` and ``margin`` (3 values each, from the lower to the upper eye)
+    :rtype: Dict[str, Any]
+    """
+    if not siv_slicers_valid(levels):
+        return {"mean": [None]*4, "std": [None]*4, "rlm": None, "snr": [None]*3, "margin": [None]*3}
+    samples = np.asarray(samples, dtype=np.float64)
+    slicers = [float(levels[4]), 0.0, float(levels[1])]
+    level_index = np.digitize(samples, slicers)
+    means: List[Any] = []
+    stds: List[Any] = []
+    for k in range(4):
+        level_samples = samples[level_index == k]
+        if level_samples.size == 0:
+            means.append(None)
+            stds.append(None)
+        else:
+            means.append(float(level_samples.mean()))
+            stds.append(float(level_samples.std()))
+
+    rlm = None
+    if means[0] is not None and means[3] is not None and means[1] is not None and means[2] is not None and means[3] > means[0]:
+        v_mid = (means[0] + means[3])/2
+        es1 = (means[1] - v_mid)/(means[0] - v_mid)
+        es2 = (means[2] - v_mid)/(means[3] - v_mid)
+        rlm = min(3*es1, 3*es2, 2 - 3*es1, 2 - 3*es2)
+
+    snrs: List[Any] = []
+    margins: List[Any] = []
+    for k in range(3):
+        if means[k] is None or means[k+1] is None:
+            snrs.append(None)
+            margins.append(None)
+            continue
+        eye_height = means[k+1] - means[k]
+        noise = stds[k] + stds[k+1]
+        snrs.append(float(20*np.log10(eye_height/noise)) if eye_height > 0 and noise > 0 else None)
+        margins.append(min(slicers[k] - means[k], means[k+1] - slicers[k]))
+
+    return {"mean": means, "std": stds, "rlm": rlm, "snr": snrs, "margin": margins}
+
+# *************************************************************************************
+# func: save_siv_archive
+# description: Save the raw SIV captures of a port into a compressed .npz file
+# *************************************************************************************
+def save_siv_archive(filepathname: str, module_id: int, port_id: int, lanes: List[int], sample_buffers: List[SIVSampleBuffer]) -> str:
+    """Save the raw SIV captures of a port into a compressed .npz file, so that the data can be analysed and plotted again without the tester.
+
+    The file contains ``levels`` (lanes x captures x 6, int16), ``samples`` (lanes x captures x 2000, int16), ``lanes``, ``module_id``, ``port_id`` and ``timestamp`` (seconds since epoch). Captures are ordered from the oldest to the newest. Use :func:`load_siv_archive` to read it back.
+
+    :param filepathname: .npz file path
+    :type filepathname: str
+    :param module_id: module index
+    :type module_id: int
+    :param port_id: port index
+    :type port_id: int
+    :param lanes: serdes lanes
+    :type lanes: List[int]
+    :param sample_buffers: SIV sample buffer of each lane
+    :type sample_buffers: List[SIVSampleBuffer]
+    :return: .npz file path
+    :rtype: str
+    """
+    np.savez_compressed(
+        filepathname,
+        levels=np.stack([buffer.levels[buffer.ordered_slots()] for buffer in sample_buffers]),
+        samples=np.stack([buffer.samples[buffer.ordered_slots()] for buffer in sample_buffers]),
+        lanes=np.array(lanes, dtype=np.int16),
+        module_id=np.int16(module_id),
+        port_id=np.int16(port_id),
+        timestamp=np.float64(time.time()),
+        )
+    return filepathname
+
+# *************************************************************************************
+# func: load_siv_archive
+# description: Load the raw SIV captures saved by save_siv_archive
+# *************************************************************************************
+def load_siv_archive(filepathname: str) -> Dict[str, np.ndarray]:
+    """Load the raw SIV captures saved by :func:`save_siv_archive`.
+
+    :param filepathname: .npz file path
+    :type filepathname: str
+    :return: the arrays of the archive
+    :rtype: Dict[str, np.ndarray]
+    """
+    with np.load(filepathname) as archive:
+        return {key: archive[key] for key in archive.files}
@@ -0,0 +1,92 @@
+import numpy as np
+from typing import List, Optional
+from .siv import SIVHistogram
+
+# *************************************************************************************
+# func: render_siv_plot
+# description: Render the SIV plot of a port and save it as a PNG file. This function
+# runs in a worker process, so it only takes plain data.
+# *************************************************************************************
+def render_siv_plot(filepathname: str, title: str, lanes: List[int], levels: List[List[int]], samples: Optional[List[np.ndarray]] = None, histograms: Optional[List[np.ndarray]] = None) -> str:
+    """Render the SIV plot of a port, one subplot per serdes lane, and save it as a PNG file. This function is meant to run in a worker process using the Agg backend, so it only takes plain data.
+
+    If ``histograms`` is given, the histogram view is drawn from the precomputed counts. Otherwise the sample view is drawn from ``samples``.
+
+    :param filepathname: PNG file path
+    :type filepathname: str
+    :param title: figure title
+    :type title: str
+    :param lanes: serdes lanes
+    :type lanes: List[int]
+    :param levels: SIV levels of each lane, (<p1> <p2> <p3> <m1> <m2> <m3>)
+    :type levels: List[List[int]]
+    :param samples: SIV sample values of each lane, defaults to None
+    :type samples: Optional[List[np.ndarray]], optional
+    :param histograms: SIV histogram counts of each lane (see :class:`SIVHistogram`), defaults to None
+    :type histograms: Optional[List[np.ndarray]], optional
+    :return: PNG file path
+    :rtype: str
+    """
+    # matplotlib is only imported when a plot is actually rendered, it takes a long time to load.
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    assert samples is not None or histograms is not None
+    lanes_to_show = len(lanes)
+
+    # figure config
+    fig = plt.figure(figsize=(10,20), dpi=80, constrained_layout=True)
+    fig.suptitle(title)
+
+    # grid spec
+    gs = fig.add_gridspec(nrows=lanes_to_show, ncols=1)
+
+    # add subplots
+    siv_subplots = []
+    for i in range(lanes_to_show):
+        siv_subplots.append(fig.add_subplot(gs[i, 0]))
+
+    for i in range(lanes_to_show):
+        siv_int_levels = levels[i]
+        siv_subplots[i].set(xlabel=f"Value", ylabel=f"Lane {lanes[i]}")
+
+        if histograms is not None:
+            bin_edges = SIVHistogram.bin_edges()
+            siv_subplots[i].barh(bin_edges[:-1], histograms[i], height=1, align="edge", color="blue")
+        else:
+            siv_subplots[i].plot(samples[i], 'bs')
+
+        # levels contains 6 values, 4 average pam4 levels and 2 slicers, (<p1> <p2> <p3> <m1> <m2> <m3>)
+        # add base slicer (this is always at 0)
+        y = 0
+        siv_subplots[i].axhline(y, color='black', linestyle='-', linewidth=0.5)
+        siv_subplots[i].text(siv_subplots[i].get_xlim()[1] + 0.1, y, f'B={y}', fontsize="small")
+        # add upper slicer <p2>
+        y = siv_int_levels[1]
+        siv_subplots[i].axhline(y, color='green', linestyle='dashed', linewidth=0.5)
+        siv_subplots[i].text(siv_subplots[i].get_xlim()[1] + 0.1, y, f'S={y}', fontsize="small")
+        # add lower slicer <m2>
+        y = siv_int_levels[4]
+        siv_subplots[i].axhline(y, color='green', linestyle='dashed', linewidth=0.5)
+        siv_subplots[i].text(siv_subplots[i].get_xlim()[1] + 0.1, y, f'S={y}', fontsize="small")
+        # add average level 3 <p3>
+        y = siv_int_levels[2]
+        siv_subplots[i].axhline(y, color='black', linestyle='dashed', linewidth=0.1)
+        siv_subplots[i].text(siv_subplots[i].get_xlim()[1] + 0.1, y, f'L3={y}', fontsize="small")
+        # add average level 2 <p1>
+        y = siv_int_levels[0]
+        siv_subplots[i].axhline(y, color='black', linestyle='dashed', linewidth=0.1)
+        siv_subplots[i].text(siv_subplots[i].get_xlim()[1] + 0.1, y, f'L2={y}', fontsize="small")
+        # add average level 1 <m3>
+        y = siv_int_levels[5]
+        siv_subplots[i].axhline(y, color='black', linestyle='dashed', linewidth=0.1)
+        siv_subplots[i].text(siv_subplots[i].get_xlim()[1] + 0.1, y, f'L1={y}', fontsize="small")
+        # add average level 0 <m1>
+        y = siv_int_levels[3]
+        siv_subplots[i].axhline(y, color='black', linestyle='dashed', linewidth=0.1)
+        siv_subplots[i].text(siv_subplots[i].get_xlim()[1] + 0.1, y, f'L0={y}', fontsize="small")
+
+    fig.savefig(filepathname)
+    plt.close(fig)
+    return filepathname
@@ -12,20 +12,26 @@ from xoa_driver.hlfuncs import mgmt, headers
 from xoa_driver.misc import Hex
 from .utils import *
 from .reportgen import *
+from .models import SIVTestConfig
+from .readiness import SettleTimeTracker, wait_until
+from .sampler import DeadlineSampler
 import logging
-from typing import List, Any
+import contextlib
+from typing import List, Any, Optional, Tuple
 from decimal import Decimal, getcontext
-import matplotlib.pyplot as plt
-from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .siv import capture_siv_data, compute_pam4_metrics, save_siv_archive, siv_slicers_valid
+from .sivplot import render_siv_plot
 
 # *************************************************************************************
 # func: prbs_test
 # *************************************************************************************
-async def prbs_test(tester_obj: testers.L23Tester, port_pair_list: List[dict], report_filename: str, logger_name: str, test_config: dict) -> None:
+async def prbs_test(tester_obj: testers.L23Tester, port_pair_list: List[dict], report_filename: str, logger_name: str, test_config: dict, port_lease: Optional[PortLeaseManager] = None) -> None:
     """PRBS Test
     """
     # Init report generator
-    report_gen = PRBSReportGenerator()
+    report_gen = PRBSReportGenerator(journal_filename=report_journal_filename(report_filename, "prbs"))
     report_gen.chassis = tester_obj.info.host
 
     # Get logger
@@ -34,19 +40,24 @@ async def prbs_test(tester_obj: testers.L23Tester, port_pair_list: List[dict], r
     # Read test configuration
     duration: int = test_config["duration"]
     polynomial: enums.PRBSPolynomial = enums.PRBSPolynomial[test_config["polynomial"]]
+    interval: float = test_config["interval"]
+    target_ber: Optional[float] = test_config["target_ber"]
+    confidence: float = test_config["confidence"]
 
     # Establish connection to a Xena tester using Python context manager
     # The connection will be automatically terminated when it is out of the block
     logger.info(f"=============== PRBS BER Test - Start ====================")
     logger.info(f"{'Tester:':<20}{tester_obj.info.host}")
     logger.info(f"{'Username:':<20}{tester_obj.session.owner_name}")
+    if target_ber is not None:
+        logger.info(f"{'Target BER:':<20}{target_ber:.2e} ({confidence*100}% confidence)")
     
     # Reserve and reset ports
     logger.info(f"Reserve and reset ports")
     tx_port_list: List[ports.Z800FreyaPort] = get_port_list(tester_obj, port_pair_list, "tx")
     rx_port_list: List[ports.Z800FreyaPort] = get_port_list(tester_obj, port_pair_list, "rx")
-    await reserve_reset_ports_in_list(tester_obj, tx_port_list)
-    await reserve_reset_ports_in_list(tester_obj, rx_port_list)
+    lease = port_lease or PortLeaseManager(tester_obj, logger_name)
+    await lease.acquire(tx_port_list + rx_port_list, reset=True)
     
     # Configure the PRBS polynomial on the TX ports, and statistics mode on the Rx ports, using command grouping.
     logger.info(f"Set PRBS polynomial on TX ports and statistics mode on RX ports")
@@ -76,15 +87,26 @@ async def prbs_test(tester_obj: testers.L23Tester, port_pair_list: List[dict], r
         for i in range(serdes_count):
             tx_prbs_tokens.append(tx_port_obj.l1.serdes[i].prbs.control.set(prbs_seed=0, prbs_on_off=enums.PRBSOnOff.PRBSON, error_on_off=enums.ErrorOnOff.ERRORSOFF))
     await asyncio.gather(*tx_prbs_tokens)
-    await asyncio.sleep(1.0)
 
-    # Prepare the PRBS statistics tokens for later use
-    prbs_stats_token_list = []
+    # Prepare the PRBS statistics tokens for later use. The lanes of all RX ports are queried in one command group,
+    # and prbs_stats_index tells the (port, serdes) of each response.
+    prbs_stats_tokens = []
+    prbs_stats_index: List[Tuple[ports.Z800FreyaPort, int]] = []
     for rx_port_obj, serdes_count in zip(rx_port_list, serdes_count_list):
-        _prbs_serdes_stats_tokens = [] # commands bound for the same port
         for i in range(serdes_count):
-            _prbs_serdes_stats_tokens.append(rx_port_obj.serdes[i].prbs.status.get())
-        prbs_stats_token_list.append(_prbs_serdes_stats_tokens)
+            prbs_stats_tokens.append(rx_port_obj.serdes[i].prbs.status.get())
+            prbs_stats_index.append((rx_port_obj, i))
+
+    async def _read_prbs_stats() -> List[Any]:
+        # apply_iter sends all tokens at once, without the 200-token limit of apply
+        return [_resp async for _resp in utils.apply_iter(*prbs_stats_tokens)]
+
+    # Wait until PRBS is locked on all serdes of all RX ports
+    logger.info(f"Wait for PRBS lock on RX ports")
+    async def _prbs_locked() -> bool:
+        _resps = await _read_prbs_stats()
+        return all(_resp.lock == enums.PRBSLockStatus.PRBSON for _resp in _resps)
+    await wait_until("prbs_lock", _prbs_locked, timeout=5.0, logger_name=logger_name, tracker=lease.settle_times)
 
     # clear counters on the Rx port
     logger.info(f"Clear counters on the RX ports")
@@ -95,23 +117,44 @@ async def prbs_test(tester_obj: testers.L23Tester, port_pair_list: List[dict], r
 
     # Start collecting PRBS statistics on RX ports
     logger.info(f"Start collecting PRBS statistics on RX ports")
-    for i in range(duration):
-        logger.info(f"  Progress: {i+1}/{duration}")
+    # In target BER mode, a lane is decided once the BER is proven below or above the target, and the test stops when all lanes are decided.
+    # Decided lanes keep being sampled and are re-evaluated on each sample, so the verdict always follows the latest counts,
+    # e.g. a lane that passed and then takes errors becomes undecided or fails.
+    verdicts = {}
+    sampler = DeadlineSampler(interval=interval, duration=duration, logger_name=logger_name)
+    async for tick in sampler.ticks():
+        logger.info(f"  Progress: {tick}/{sampler.tick_count}")
         
-        for serdes_tokens in prbs_stats_token_list:
-            _index = prbs_stats_token_list.index(serdes_tokens)
-            _resps = await utils.apply(*serdes_tokens)
-            rx_port_obj = rx_port_list[_index]
-            serdes_count = serdes_count_list[_index]
-            for i in range(serdes_count):
-                _prbs_lock = convert_prbs_lock_status(_resps[i].lock)
-                if _resps[i].error_count > 0:
-                    logger.info(f"  Port {rx_port_obj.kind.module_id}/{rx_port_obj.kind.port_id}, SerDes {i}: PRBS Lock={_prbs_lock}, PRBS Bits={_resps[i].byte_count*8}, PRBS Errors={_resps[i].error_count}, Error Rate={_resps[i].error_count/_resps[0].byte_count/8}")
-                else:
-                    logger.info(f"  Port {rx_port_obj.kind.module_id}/{rx_port_obj.kind.port_id}, SerDes {i}: PRBS Lock={_prbs_lock}, PRBS Bits={_resps[i].byte_count*8}, PRBS Errors={_resps[i].error_count}, Error Rate<{4.6/_resps[0].byte_count/8}")
-                report_gen.record_data(port_name=f"Port {rx_port_obj.kind.module_id}/{rx_port_obj.kind.port_id} - SerDes {i}", prbs_lock=_prbs_lock, prbs_bits=_resps[i].byte_count*8, prbs_errors=_resps[i].error_count)
-
-        await asyncio.sleep(1.0)
+        _resps = await _read_prbs_stats()
+        for (rx_port_obj, serdes), _resp in zip(prbs_stats_index, _resps):
+            _port_name = f"Port {rx_port_obj.kind.module_id}/{rx_port_obj.kind.port_id} - SerDes {serdes}"
+            _prbs_lock = convert_prbs_lock_status(_resp.lock)
+            # calc_prbs_ber gives the upper bound if there is no error, and None if no bit is received yet
+            _ber = format_ber(calc_prbs_ber(_resp.byte_count*8, _resp.error_count))
+            if _resp.error_count > 0 or _resp.byte_count == 0:
+                logger.info(f"  Port {rx_port_obj.kind.module_id}/{rx_port_obj.kind.port_id}, SerDes {serdes}: PRBS Lock={_prbs_lock}, PRBS Bits={_resp.byte_count*8}, PRBS Errors={_resp.error_count}, Error Rate={_ber}")
+            else:
+                logger.info(f"  Port {rx_port_obj.kind.module_id}/{rx_port_obj.kind.port_id}, SerDes {serdes}: PRBS Lock={_prbs_lock}, PRBS Bits={_resp.byte_count*8}, PRBS Errors={_resp.error_count}, Error Rate<{_ber}")
+            report_gen.record_data(port_name=_port_name, prbs_lock=_prbs_lock, prbs_bits=_resp.byte_count*8, prbs_errors=_resp.error_count)
+            if target_ber is not None:
+                _verdict = ber_target_verdict(_resp.byte_count*8, _resp.error_count, target_ber, confidence)
+                if _verdict is not None and _verdict != verdicts.get(_port_name):
+                    verdicts[_port_name] = _verdict
+                    logger.info(f"  {_port_name}: {_verdict.upper()} at tick {tick}")
+                elif _verdict is None and _port_name in verdicts:
+                    logger.warning(f"  {_port_name}: {verdicts.pop(_port_name).upper()} no longer holds at tick {tick}, undecided")
+        if target_ber is not None and len(verdicts) == len(prbs_stats_index):
+            logger.info(f"  All lanes decided, stop early")
+            break
+    sampler.log_summary()
+
+    # Record the verdicts of the target BER mode
+    if target_ber is not None:
+        for rx_port_obj, serdes in prbs_stats_index:
+            _port_name = f"Port {rx_port_obj.kind.module_id}/{rx_port_obj.kind.port_id} - SerDes {serdes}"
+            _verdict = verdicts.get(_port_name, "inconclusive").upper()
+            logger.info(f"  {_port_name}: {_verdict} (target BER {target_ber:.2e}, {confidence*100}% confidence, last sample)")
+            report_gen.record_verdict(_port_name, f"{_verdict} (target BER {target_ber:.2e}, {confidence*100}% confidence, evaluated on the last sample)")
 
     # Generate report
     logger.info(f"Generate PRBS report")
@@ -126,9 +169,9 @@ async def prbs_test(tester_obj: testers.L23Tester, port_pair_list: List[dict], r
     await asyncio.gather(*prbs_stop_tokens)
 
     # Release the ports
-    logger.info(f"Release the ports")
-    await release_ports_in_list(tx_port_list)
-    await release_ports_in_list(rx_port_list)
+    if port_lease is None:
+        logger.info(f"Release the ports")
+        await lease.release_all()
 
     # The End
     logger.info(f"=============== PRBS BER Test - End =====================")
@@ -136,12 +179,12 @@ async def prbs_test(tester_obj: testers.L23Tester, port_pair_list: List[dict], r
 # *************************************************************************************
 # func: fec_test
 # *************************************************************************************
-async def fec_test(tester_obj: testers.L23Tester, port_pair_list: List[dict], report_filename: str, logger_name: str, test_config: dict) -> None:
+async def fec_test(tester_obj: testers.L23Tester, port_pair_list: List[dict], report_filename: str, logger_name: str, test_config: dict, port_lease: Optional[PortLeaseManager] = None) -> None:
     """FEC Test
     """
     
     # Init report generator
-    report_gen = FECReportGenerator()
+    report_gen = FECReportGenerator(journal_filename=report_journal_filename(report_filename, "fec"))
     report_gen.chassis = tester_obj.info.host
 
     # Get logger
@@ -149,6 +192,7 @@ async def fec_test(tester_obj: testers.L23Tester, port_pair_list: List[dict], re
 
     # Read test configuration
     duration: int = test_config["duration"]
+    interval: float = test_config["interval"]
 
     # Establish connection to a Xena tester using Python context manager
     # The connection will be automatically terminated when it is out of the block
@@ -160,8 +204,8 @@ async def fec_test(tester_obj: testers.L23Tester, port_pair_list: List[dict], re
     logger.info(f"Reserve and reset ports")
     tx_port_list: List[ports.Z800FreyaPort] = get_port_list(tester_obj, port_pair_list, "tx")
     rx_port_list: List[ports.Z800FreyaPort] = get_port_list(tester_obj, port_pair_list, "rx")
-    await reserve_reset_ports_in_list(tester_obj, tx_port_list)
-    await reserve_reset_ports_in_list(tester_obj, rx_port_list)
+    lease = port_lease or PortLeaseManager(tester_obj, logger_name)
+    await lease.acquire(tx_port_list + rx_port_list, reset=True)
     
     # Enable FEC on TX ports
     logger.info(f"Enable FEC on TX ports")
@@ -184,8 +228,9 @@ async def fec_test(tester_obj: testers.L23Tester, port_pair_list: List[dict], re
 
     # Start collecting pre-FEC and post-FEC statistics on RX ports
     logger.info(f"Start collecting pre-FEC and post-FEC statistics on RX ports")
-    for i in range(duration):
-        logger.info(f"  Progress: {i+1}/{duration}")
+    sampler = DeadlineSampler(interval=interval, duration=duration, logger_name=logger_name)
+    async for tick in sampler.ticks():
+        logger.info(f"  Progress: {tick}/{sampler.tick_count}")
 
         total_status_list = await asyncio.gather(*fec_stats_tokens)
 
@@ -195,17 +240,16 @@ async def fec_test(tester_obj: testers.L23Tester, port_pair_list: List[dict], re
             logger.info(f"  Port {rx_port_obj.kind.module_id}/{rx_port_obj.kind.port_id}: Pre-FEC BER={pre_fec_ber}, Post-FEC BER={post_fec_ber}")
 
             report_gen.record_data(port_name=f"Port {rx_port_obj.kind.module_id}/{rx_port_obj.kind.port_id}", pre_fec_ber=pre_fec_ber, post_fec_ber=post_fec_ber)
-
-        await asyncio.sleep(1.0)
+    sampler.log_summary()
 
     # Generate report
     logger.info(f"Generate FEC BER report")
     report_gen.generate_report(report_filename)
 
     # Release the ports
-    logger.info(f"Release the ports")
-    await release_ports_in_list(tx_port_list)
-    await release_ports_in_list(rx_port_list)
+    if port_lease is None:
+        logger.info(f"Release the ports")
+        await lease.release_all()
 
     # The End
     logger.info(f"=============== FEC BER Test - End =====================")
@@ -213,12 +257,12 @@ async def fec_test(tester_obj: testers.L23Tester, port_pair_list: List[dict], re
 # *************************************************************************************
 # func: tcvr_basic_info
 # *************************************************************************************
-async def tcvr_basic_info(tester_obj: testers.L23Tester, port_pair_list: List[dict], report_filename: str, logger_name: str) -> None:
+async def tcvr_basic_info(tester_obj: testers.L23Tester, port_pair_list: List[dict], report_filename: str, logger_name: str, port_lease: Optional[PortLeaseManager] = None) -> None:
     """Read transceiver basic info
     """
 
     # Init report generator
-    report_gen = TransceiverReportGenerator()
+    report_gen = TransceiverReportGenerator(journal_filename=report_journal_filename(report_filename, "tcvr"))
     report_gen.chassis = tester_obj.info.host
 
     # Get logger
@@ -230,59 +274,166 @@ async def tcvr_basic_info(tester_obj: testers.L23Tester, port_pair_list: List[di
     logger.info(f"{'Tester:':<20}{tester_obj.info.host}")
     logger.info(f"{'Username:':<20}{tester_obj.session.owner_name}")
     
-    # Reserve and reset ports
-    logger.info(f"Reserve and reset ports")
+    # Reserve ports
+    logger.info(f"Reserve ports")
     tx_port_list: List[ports.Z800FreyaPort] = get_port_list(tester_obj, port_pair_list, "tx")
     rx_port_list: List[ports.Z800FreyaPort] = get_port_list(tester_obj, port_pair_list, "rx")
-    await reserve_reset_ports_in_list(tester_obj, tx_port_list)
-    await reserve_reset_ports_in_list(tester_obj, rx_port_list)
-
-    # Read TX ports transceiver info
-    logger.info(f"Read TX ports transceiver info")
-    for tx_port_obj in tx_port_list:
-        result = await get_tcvr_vendor_name(tx_port_obj)
-        report_gen.record_data(port_name=f"Port {tx_port_obj.kind.module_id}/{tx_port_obj.kind.port_id}", description=result["description"], ascii_value=result["acsii_value"], raw_value=result["hex_value"])
-        result = await get_tcvr_vendor_pn(tx_port_obj)
-        report_gen.record_data(port_name=f"Port {tx_port_obj.kind.module_id}/{tx_port_obj.kind.port_id}", description=result["description"], ascii_value=result["acsii_value"], raw_value=result["hex_value"])
-        result = await get_tcvr_vendor_sn(tx_port_obj)
-        report_gen.record_data(port_name=f"Port {tx_port_obj.kind.module_id}/{tx_port_obj.kind.port_id}", description=result["description"], ascii_value=result["acsii_value"], raw_value=result["hex_value"])
-        result = await get_tcvr_cable_length(tx_port_obj)
-        report_gen.record_data(port_name=f"Port {tx_port_obj.kind.module_id}/{tx_port_obj.kind.port_id}", description=result["description"], ascii_value=result["acsii_value"], raw_value=result["hex_value"])
-    
-    # Read RX ports transceiver info
-    logger.info(f"Read RX ports transceiver info")
-    for rx_port_obj in rx_port_list:
-        result = await get_tcvr_vendor_name(rx_port_obj)
-        report_gen.record_data(port_name=f"Port {rx_port_obj.kind.module_id}/{rx_port_obj.kind.port_id}", description=result["description"], ascii_value=result["acsii_value"], raw_value=result["hex_value"])
-        result = await get_tcvr_vendor_pn(rx_port_obj)
-        report_gen.record_data(port_name=f"Port {rx_port_obj.kind.module_id}/{rx_port_obj.kind.port_id}", description=result["description"], ascii_value=result["acsii_value"], raw_value=result["hex_value"])
-        result = await get_tcvr_vendor_sn(rx_port_obj)
-        report_gen.record_data(port_name=f"Port {rx_port_obj.kind.module_id}/{rx_port_obj.kind.port_id}", description=result["description"], ascii_value=result["acsii_value"], raw_value=result["hex_value"])
-        result = await get_tcvr_cable_length(rx_port_obj)
-        report_gen.record_data(port_name=f"Port {rx_port_obj.kind.module_id}/{rx_port_obj.kind.port_id}", description=result["description"], ascii_value=result["acsii_value"], raw_value=result["hex_value"])
+    lease = port_lease or PortLeaseManager(tester_obj, logger_name)
+    await lease.acquire(tx_port_list + rx_port_list, reset=False)
+
+    # Read transceiver info of all TX and RX ports concurrently
+    logger.info(f"Read TX and RX ports transceiver info")
+    async def _read_tcvr_info(port_obj: ports.Z800FreyaPort) -> List[dict]:
+        return list(await asyncio.gather(
+            get_tcvr_vendor_name(port_obj, lease.cmis_cache),
+            get_tcvr_vendor_pn(port_obj, lease.cmis_cache),
+            get_tcvr_vendor_sn(port_obj, lease.cmis_cache),
+            get_tcvr_cable_length(port_obj, lease.cmis_cache),
+        ))
+    total_port_list = tx_port_list + rx_port_list
+    results_list = await asyncio.gather(*[_read_tcvr_info(port_obj) for port_obj in total_port_list])
+
+    # Record the results in port order, TX ports first
+    for port_obj, results in zip(total_port_list, results_list):
+        for result in results:
+            report_gen.record_data(port_name=f"Port {port_obj.kind.module_id}/{port_obj.kind.port_id}", description=result["description"], ascii_value=result["acsii_value"], raw_value=result["hex_value"])
 
     # Generate report
     logger.info(f"Generate trasceiver basic info report")
     report_gen.generate_report(report_filename)
 
     # Release the ports
-    logger.info(f"Release the ports")
-    await release_ports_in_list(tx_port_list)
-    await release_ports_in_list(rx_port_list)
+    if port_lease is None:
+        logger.info(f"Release the ports")
+        await lease.release_all()
 
     # The End
     logger.info(f"=============== Read Transceiver Info - End =====================")
 
+# *************************************************************************************
+# func: create_latency_frame_loss_streams
+# description: Create one test stream on the TX port of each port pair. The streams
+# are reused by all trials of the latency and frame loss test.
+# *************************************************************************************
+async def create_latency_frame_loss_streams(tx_port_list: List[ports.Z800FreyaPort], rx_port_list: List[ports.Z800FreyaPort], tpld_id_list: List[int]) -> List[Any]:
+    """Create one test stream on the TX port of each port pair. Only the traffic rate and the packet size are changed by each trial.
+    """
+    stream_list = await asyncio.gather(*[tx_port_obj.streams.create() for tx_port_obj in tx_port_list])
+    _mac_resps = await utils.apply(
+        *[rx_port_obj.net_config.mac_address.get() for rx_port_obj in rx_port_list],
+        *[tx_port_obj.net_config.mac_address.get() for tx_port_obj in tx_port_list],
+    )
+    _dmac_resps = _mac_resps[:len(rx_port_list)]
+    _smac_resps = _mac_resps[len(rx_port_list):]
+    stream_config_tokens = []
+    for stream_obj, tpld_id, _dmac_resp, _smac_resp in zip(stream_list, tpld_id_list, _dmac_resps, _smac_resps):
+        stream_index = stream_obj.idx
+        stream_config_tokens.extend([
+            stream_obj.tpld_id.set(test_payload_identifier=tpld_id),
+            stream_obj.enable.set_on(),
+            stream_obj.comment.set(comment=f"Latency and Frame Loss Test Stream ({stream_index}/{tpld_id})"),
+            stream_obj.payload.content.set(payload_type=enums.PayloadType.INCREMENTING, hex_data=Hex("DEAD")),
+            stream_obj.packet.header.protocol.set(segments=[
+                enums.ProtocolOption.ETHERNET]),
+            stream_obj.packet.header.data.set(hex_data=Hex(f"{_dmac_resp.mac_address}{_smac_resp.mac_address}FFFF")),
+        ])
+    await utils.apply(*stream_config_tokens)
+    return list(stream_list)
+
+# *************************************************************************************
+# func: run_latency_frame_loss_trial
+# description: Run one latency and frame loss trial on the port pairs, each pair with
+# its own traffic rate, and return the measured results of each pair.
+# *************************************************************************************
+async def run_latency_frame_loss_trial(tx_port_list: List[ports.Z800FreyaPort], rx_port_list: List[ports.Z800FreyaPort], stream_list: List[Any], tpld_id_list: List[int], traffic_rates: List[Decimal], packet_size: int, duration: int, logger_name: str, tracker: Optional[SettleTimeTracker] = None) -> List[dict]:
+    """Run one latency and frame loss trial. All port pairs send traffic at the same time, each pair at its own traffic rate.
+    """
+    # Get logger
+    logger = logging.getLogger(logger_name)
+
+    # Set traffic rate and packet size of the streams, and clear statistics on TX and RX ports, in one command group
+    logger.info(f"Configure streams and clear statistics on TX and RX ports")
+    config_tokens = []
+    start_tokens = []
+    stop_tokens = []
+    for tx_port_obj, rx_port_obj, stream_obj, traffic_rate in zip(tx_port_list, rx_port_list, stream_list, traffic_rates):
+        config_tokens.append(stream_obj.rate.fraction.set(stream_rate_ppm=int(1_000_000*traffic_rate)))
+        config_tokens.append(stream_obj.packet.length.set(length_type=enums.LengthType.FIXED, min_val=packet_size, max_val=packet_size))
+        config_tokens.append(tx_port_obj.statistics.tx.clear.set())
+        config_tokens.append(tx_port_obj.statistics.rx.clear.set())
+        config_tokens.append(rx_port_obj.statistics.tx.clear.set())
+        config_tokens.append(rx_port_obj.statistics.rx.clear.set())
+
+        start_tokens.append(tx_port_obj.traffic.state.set_start())
+        stop_tokens.append(tx_port_obj.traffic.state.set_stop())
+    await utils.apply(*config_tokens)
+
+    # Start traffic
+    logger.info(f"Start traffic")
+    await asyncio.gather(*start_tokens)
+
+    #  Test duration in seconds
+    logger.info(f"Test duration: {duration} seconds")
+    await asyncio.sleep(duration)
+
+    # Stop traffic
+    logger.info(f"Stop traffic")
+    await asyncio.gather(*stop_tokens)
+    await wait_traffic_stopped(tx_port_list, logger_name=logger_name, tracker=tracker)
+
+    # Wait until the frames in flight are received, i.e. the RX counters stop changing
+    rx_counters = []
+    async def _rx_settled() -> bool:
+        _resps = await utils.apply(*[rx_port_obj.statistics.rx.access_tpld(tpld_id).traffic.get() for rx_port_obj, tpld_id in zip(rx_port_list, tpld_id_list)])
+        _counters = [_resp.packet_count_since_cleared for _resp in _resps]
+        _settled = _counters == rx_counters
+        rx_counters[:] = _counters
+        return _settled
+    await wait_until("latency_rx_settle", _rx_settled, timeout=5.0, logger_name=logger_name, tracker=tracker)
+
+    # Query stream statistics of all port pairs in one command group
+    stats_tokens = []
+    for tx_port_obj, rx_port_obj, stream_obj, tpld_id in zip(tx_port_list, rx_port_list, stream_list, tpld_id_list):
+        stats_tokens.extend([
+            tx_port_obj.statistics.tx.obtain_from_stream(stream_obj.idx).get(),
+            rx_port_obj.statistics.rx.access_tpld(tpld_id).traffic.get(),
+            rx_port_obj.statistics.rx.access_tpld(tpld_id).latency.get(),
+            rx_port_obj.statistics.rx.access_tpld(tpld_id).jitter.get(),
+        ])
+    stats_resps = await utils.apply(*stats_tokens)
+
+    results = []
+    for n, (tx_port_obj, rx_port_obj, traffic_rate) in enumerate(zip(tx_port_list, rx_port_list, traffic_rates)):
+        tx_stream, rx_stream, rx_stream_latency, rx_stream_jitter = stats_resps[4*n:4*n+4]
+        _description = f"Port {tx_port_obj.kind.module_id}/{tx_port_obj.kind.port_id} -> Port {rx_port_obj.kind.module_id}/{rx_port_obj.kind.port_id}"
+        _frame_loss = tx_stream.packet_count_since_cleared - rx_stream.packet_count_since_cleared
+        _latency = rx_stream_latency.avg_val
+        _jitter = rx_stream_jitter.avg_val
+        logger.info(f"{_description}")
+        logger.info(f"  Rate: {traffic_rate*100} %")
+        logger.info(f"  Packet Size: {packet_size} bytes")
+        logger.info(f"  Frame Loss: {_frame_loss}")
+        logger.info(f"  Latency   : {_latency} ns")
+        logger.info(f"  Jitter    : {_jitter} ns")
+        results.append({
+            "description": _description,
+            "traffic_rate": traffic_rate,
+            "frame_loss": _frame_loss,
+            "latency": _latency,
+            "jitter": _jitter,
+        })
+    return results
+
 # *************************************************************************************
 # func: latency_frame_loss_test
 # *************************************************************************************
-async def latency_frame_loss_test(tester_obj: testers.L23Tester, port_pair_list: List[dict], report_filename: str, logger_name: str, test_config: dict) -> None:
+async def latency_frame_loss_test(tester_obj: testers.L23Tester, port_pair_list: List[dict], report_filename: str, logger_name: str, test_config: dict, port_lease: Optional[PortLeaseManager] = None) -> None:
     """Latency and Frame Loss Test
     """
     getcontext().prec = 6
 
     # Init report generator
-    report_gen = LatencyFrameLossReportGenerator()
+    report_gen = LatencyFrameLossReportGenerator(journal_filename=report_journal_filename(report_filename, "latency"))
     report_gen.chassis = tester_obj.info.host
 
     # Get logger
@@ -294,6 +445,9 @@ async def latency_frame_loss_test(tester_obj: testers.L23Tester, port_pair_list:
     step_rate: float = test_config["step_rate"]
     packet_sizes = test_config["packet_sizes"]
     duration: int = test_config["duration"]
+    mode: str = test_config["mode"]
+    resolution: float = test_config["resolution"]
+    assert mode in ("sweep", "throughput"), f"Unknown latency and frame loss test mode: {mode}"
     
     # Establish connection to a Xena tester using Python context manager
     # The connection will be automatically terminated when it is out of the block
@@ -301,109 +455,84 @@ async def latency_frame_loss_test(tester_obj: testers.L23Tester, port_pair_list:
     logger.info(f"{'Tester:':<20}{tester_obj.info.host}")
     logger.info(f"{'Username:':<20}{tester_obj.session.owner_name}")
     logger.info(f"Test configuration:")
+    logger.info(f"  Mode: {mode}")
     logger.info(f"  Start Rate: {start_rate*100}%")
     logger.info(f"  End Rate: {end_rate*100}%")
-    logger.info(f"  Step Rate: {step_rate*100}%")
+    if mode == "sweep":
+        logger.info(f"  Step Rate: {step_rate*100}%")
+    else:
+        logger.info(f"  Resolution: {resolution*100}%")
     logger.info(f"  Packet Sizes: {packet_sizes} bytes")
     logger.info(f"  Duration: {duration} seconds (each)")
     traffic_rates = [Decimal(start_rate) + Decimal(step_rate)*i for i in range(int((end_rate-start_rate)/step_rate)+1)]
     if end_rate not in traffic_rates:
         traffic_rates.append(Decimal(end_rate))
-    logger.info(f"Total tests: {len(traffic_rates)*len(packet_sizes)}")
+    if mode == "sweep":
+        logger.info(f"Total tests: {len(traffic_rates)*len(packet_sizes)}")
 
     # Reserve and reset ports
     tx_port_list: List[ports.Z800FreyaPort] = get_port_list(tester_obj, port_pair_list, "tx")
     rx_port_list: List[ports.Z800FreyaPort] = get_port_list(tester_obj, port_pair_list, "rx")
     logger.info(f"Reserve and reset ports")
-    await reserve_reset_ports_in_list(tester_obj, tx_port_list)
-    await reserve_reset_ports_in_list(tester_obj, rx_port_list)
-    await asyncio.sleep(1.0)
-    
-    i = 0
-    for traffic_rate in traffic_rates:
+    lease = port_lease or PortLeaseManager(tester_obj, logger_name)
+    await lease.acquire(tx_port_list + rx_port_list, reset=True)
+    tpld_id_list = [i for i in range(0, len(tx_port_list))]
+
+    # Create the streams once, and reuse them in all trials
+    logger.info(f"Create streams")
+    stream_list = await create_latency_frame_loss_streams(tx_port_list, rx_port_list, tpld_id_list)
+
+    if mode == "sweep":
+        i = 0
+        for traffic_rate in traffic_rates:
+            for packet_size in packet_sizes:
+                logger.info(f"Test {i} (Rate={traffic_rate*100}%, Packet Size={packet_size} bytes)")
+                results = await run_latency_frame_loss_trial(tx_port_list, rx_port_list, stream_list, tpld_id_list, [traffic_rate]*len(tx_port_list), packet_size, duration, logger_name, lease.settle_times)
+                for result in results:
+                    report_gen.record_data(port_name=result["description"], description=result["description"], traffic_rate=float(result["traffic_rate"]), packet_size=packet_size, frame_loss=result["frame_loss"], latency=result["latency"], jitter=result["jitter"])
+                i += 1
+    else:
+        # RFC 2544 throughput: binary-search the zero-loss rate of each port pair, for each packet size.
+        throughput_report_gen = ThroughputReportGenerator(journal_filename=report_journal_filename(report_filename, "throughput"))
+        throughput_report_gen.chassis = tester_obj.info.host
+        i = 0
         for packet_size in packet_sizes:
-            logger.info(f"Test {i} (Rate={traffic_rate*100}%, Packet Size={packet_size} bytes)")
-
-            # Configure streams
-            logger.info(f"Configure streams")
-            clear_tokens = []
-            start_tokens = []
-            stop_tokens = []
-            tpld_id_list = [i for i in range(0, len(tx_port_list))]
-            for tx_port_obj, rx_port_obj, tpld_id in zip(tx_port_list, rx_port_list, tpld_id_list):
-                stream_obj = await tx_port_obj.streams.create()
-                stream_index = stream_obj.idx
-                _dmac_resp = await rx_port_obj.net_config.mac_address.get()
-                _smac_resp = await tx_port_obj.net_config.mac_address.get()
-                await utils.apply(
-                    stream_obj.tpld_id.set(test_payload_identifier=tpld_id),
-                    stream_obj.enable.set_on(),
-                    stream_obj.comment.set(comment=f"Latency and Frame Loss Test Stream ({stream_index}/{tpld_id})"),
-                    stream_obj.payload.content.set(payload_type=enums.PayloadType.INCREMENTING, hex_data=Hex("DEAD")),
-                    stream_obj.rate.fraction.set(stream_rate_ppm=int(1_000_000*traffic_rate)),
-                    stream_obj.packet.length.set(length_type=enums.LengthType.FIXED, min_val=packet_size, max_val=packet_size),
-                    stream_obj.packet.header.protocol.set(segments=[
-                        enums.ProtocolOption.ETHERNET]),
-                    stream_obj.packet.header.data.set(hex_data=Hex(f"{_dmac_resp.mac_address}{_smac_resp.mac_address}FFFF")),
-                )
-                clear_tokens.append(tx_port_obj.statistics.tx.clear.set())
-                clear_tokens.append(tx_port_obj.statistics.rx.clear.set())
-                clear_tokens.append(rx_port_obj.statistics.tx.clear.set())
-                clear_tokens.append(rx_port_obj.statistics.rx.clear.set())
-
-                start_tokens.append(tx_port_obj.traffic.state.set_start())
-                stop_tokens.append(tx_port_obj.traffic.state.set_stop())
-            await asyncio.sleep(1.0)
-
-            # Batch clear statistics on TX and RX ports
-            logger.info(f"Clear statistics on TX and RX ports")
-            await asyncio.gather(*clear_tokens)
-            await asyncio.sleep(1.0)
-
-            # Start traffic
-            logger.info(f"Start traffic")
-            await asyncio.gather(*start_tokens)
-
-            #  Test duration in seconds
-            logger.info(f"Test duration: {duration} seconds")
-            await asyncio.sleep(duration)
-
-            # Stop traffic
-            logger.info(f"Stop traffic")
-            await asyncio.gather(*stop_tokens)
-            await asyncio.sleep(1.0)
-
-            # # Query stream statistics
-            for tx_port_obj, rx_port_obj , tpld_id in zip(tx_port_list, rx_port_list, tpld_id_list):
-                tx_stream, rx_stream, rx_stream_latency, rx_stream_jitter = await asyncio.gather(
-                    tx_port_obj.statistics.tx.obtain_from_stream(0).get(),
-                    rx_port_obj.statistics.rx.access_tpld(tpld_id).traffic.get(),
-                    rx_port_obj.statistics.rx.access_tpld(tpld_id).latency.get(),
-                    rx_port_obj.statistics.rx.access_tpld(tpld_id).jitter.get(),
-                )
+            searches = [ThroughputSearch(Decimal(start_rate), Decimal(end_rate), Decimal(resolution)) for _ in tx_port_list]
+            while not all(search.done for search in searches):
+                active = [j for j, search in enumerate(searches) if not search.done]
+                _rates = [searches[j].next_rate for j in active]
+                logger.info(f"Test {i} (Rate={[float(x*100) for x in _rates]}%, Packet Size={packet_size} bytes)")
+                results = await run_latency_frame_loss_trial([tx_port_list[j] for j in active], [rx_port_list[j] for j in active], [stream_list[j] for j in active], [tpld_id_list[j] for j in active], _rates, packet_size, duration, logger_name, lease.settle_times)
+                for j, result in zip(active, results):
+                    searches[j].update(result["frame_loss"] <= 0, result)
+                    report_gen.record_data(port_name=result["description"], description=result["description"], traffic_rate=float(result["traffic_rate"]), packet_size=packet_size, frame_loss=result["frame_loss"], latency=result["latency"], jitter=result["jitter"])
+                i += 1
+            for tx_port_obj, rx_port_obj, search in zip(tx_port_list, rx_port_list, searches):
                 _description = f"Port {tx_port_obj.kind.module_id}/{tx_port_obj.kind.port_id} -> Port {rx_port_obj.kind.module_id}/{rx_port_obj.kind.port_id}"
-                _frame_loss = tx_stream.packet_count_since_cleared - rx_stream.packet_count_since_cleared
-                _latency = rx_stream_latency.avg_val
-                _jitter = rx_stream_jitter.avg_val
-                logging.info(f"{_description}")
-                logging.info(f"  Rate: {traffic_rate*100} %")
-                logging.info(f"  Packet Size: {packet_size} bytes")
-                logging.info(f"  Frame Loss: {_frame_loss}")
-                logging.info(f"  Latency   : {_latency} ns")
-                logging.info(f"  Jitter    : {_jitter} ns")
-                report_gen.record_data(port_name=_description, description=_description, traffic_rate=float(traffic_rate), packet_size=packet_size, frame_loss=_frame_loss, latency=_latency, jitter=_jitter)
-            for tx_port_obj in tx_port_list:
-                await tx_port_obj.streams.obtain(0).delete()
-            i += 1    
+                _best = search.best_result
+                if _best is None:
+                    logger.info(f"{_description}: Packet Size={packet_size} bytes, no zero-loss rate found at or above {start_rate*100}% ({search.trials} trials)")
+                    throughput_report_gen.record_data(port_name=_description, description=_description, packet_size=packet_size, throughput=None, trials=search.trials, latency=None, jitter=None)
+                else:
+                    logger.info(f"{_description}: Packet Size={packet_size} bytes, Throughput={float(_best['traffic_rate']*100)}% ({search.trials} trials)")
+                    throughput_report_gen.record_data(port_name=_description, description=_description, packet_size=packet_size, throughput=float(_best["traffic_rate"]), trials=search.trials, latency=_best["latency"], jitter=_best["jitter"])
+
+    # Delete the streams
+    logger.info(f"Delete streams")
+    # stream delete() is a coroutine, not a token, so it can not go in a command group. It also drops the stream from
+    # port.streams. The deletes are started together, so they share one round-trip on the connection.
+    await asyncio.gather(*[stream_obj.delete() for stream_obj in stream_list])
 
     # Generate report
     logger.info(f"Generate latency and frame loss report")
     report_gen.generate_report(report_filename)
+    if mode == "throughput":
+        throughput_report_gen.generate_report(report_filename)
 
     # Release the ports
-    logger.info(f"Release the ports")
-    await release_ports_in_list(tx_port_list)
-    await release_ports_in_list(rx_port_list)
+    if port_lease is None:
+        logger.info(f"Release the ports")
+        await lease.release_all()
 
     # The End
     logger.info(f"=============== Latency & Frame Loss Test - End =====================")
@@ -411,161 +540,103 @@ async def latency_frame_loss_test(tester_obj: testers.L23Tester, port_pair_list:
 # *************************************************************************************
 # func: signal_integrity_info
 # *************************************************************************************
-async def signal_integrity_info(tester_obj: testers.L23Tester, port_pair_list: List[dict], logger_name: str, should_histogram: bool, path: str) -> None:
-    """Signal Integrity Info
+async def signal_integrity_info(tester_obj: testers.L23Tester, port_pair_list: List[dict], logger_name: str, should_histogram: bool, path: str, test_config: Optional[dict] = None, port_lease: Optional[PortLeaseManager] = None, report_filename: Optional[str] = None) -> None:
+    """Signal Integrity Info. If ``report_filename`` is given, the PAM4 eye metrics of each serdes lane are also computed from the same captures and recorded in the report.
     """
 
     # Get logger
     logger = logging.getLogger(logger_name)
 
+    # Read test configuration
+    if test_config is None:
+        test_config = SIVTestConfig().model_dump()
+    captures: int = test_config["captures"]
+    buffer_depth: int = test_config["buffer_depth"]
+    render: bool = test_config["render"]
+
     # Establish connection to a Xena tester using Python context manager
     # The connection will be automatically terminated when it is out of the block
     
     logger.info(f"=============== Signal Integrity - Start ====================")
     logger.info(f"{'Tester:':<20}{tester_obj.info.host}")
     logger.info(f"{'Username:':<20}{tester_obj.session.owner_name}")
+    logger.info(f"{'Captures:':<20}{captures}")
+    logger.info(f"{'Buffer Depth:':<20}{buffer_depth}")
+    logger.info(f"{'Render:':<20}{render}")
     
-    # Reserve and reset ports
-    logger.info(f"Reserve and reset ports")
+    # Reserve ports
+    logger.info(f"Reserve ports")
     tx_port_list: List[ports.Z800FreyaPort] = get_port_list(tester_obj, port_pair_list, "tx")
     rx_port_list: List[ports.Z800FreyaPort] = get_port_list(tester_obj, port_pair_list, "rx")
-    await reserve_reset_ports_in_list(tester_obj, tx_port_list)
-    await reserve_reset_ports_in_list(tester_obj, rx_port_list)
-
-    await asyncio.sleep(3.0)
+    lease = port_lease or PortLeaseManager(tester_obj, logger_name)
+    await lease.acquire(tx_port_list + rx_port_list, reset=False)
+    await wait_ports_in_sync(tx_port_list + rx_port_list, logger_name=logger_name, tracker=lease.settle_times)
 
     # Merge TX and RX port list
     total_port_list = list(set(tx_port_list + rx_port_list))
 
-    for port_obj in total_port_list:
-        # Read number of serdes lanes
-        resp = await port_obj.capabilities.get()
-        # Show all lanes
-        lanes_to_show = resp.serdes_count
-        lanes = [i for i in range(lanes_to_show)]
-
-        # figure config
-        plt.ion()
-        fig = plt.figure(figsize=(10,20), dpi=80, constrained_layout=True)
-        fig.suptitle(f"Port {port_obj.kind.module_id}/{port_obj.kind.port_id} Signal Integrity")
-
-        # grid spec
-        # if lanes_to_show == 1:
-        gs = fig.add_gridspec(nrows=lanes_to_show, ncols=1)
-        # if lanes_to_show > 1:
-        #     gs = fig.add_gridspec(nrows=math.ceil(lanes_to_show/2), ncols=2)
-
-        # add subplots
-        siv_subplots = []
-        for i in range(lanes_to_show):
-            # siv_subplots.append(fig.add_subplot(gs[i%gs.nrows, int(i/gs.nrows)]))
-            siv_subplots.append(fig.add_subplot(gs[i, 0]))
-        
-        # data dequeue for each serdes lane. queue depth = density*2000
-        INT_CNT_PER_DATA = 2000
-        density = 1
-        data_queue = []
-        for _ in range(lanes_to_show):
-            data_queue.append(deque((), maxlen=density*INT_CNT_PER_DATA))
-
-        # set x and y label for each subplot
-        for i in range(lanes_to_show):
-            siv_subplots[i].set(xlabel=f"Value", ylabel=f"Lane {lanes[i]}")
-        
-        # group control commands for each serdes lane together to later send it as a command group.
-        control_cmd_group = []
-        for i in range(lanes_to_show):
-            control_cmd_group.append(port_obj.l1.serdes[lanes[i]].medium.siv.control.set(opcode=enums.Layer1Opcode.START_SCAN))
-        
-        # get commands for each serdes lane together to later send it as a command group.
-        get_cmd_group = []
-        for i in range(lanes_to_show):
-            get_cmd_group.append(port_obj.l1.serdes[lanes[i]].medium.siv.data.get())
-
-        resp_group = ()
-        await utils.apply(*control_cmd_group)
-        while True:
-            # get responses from all lanes
-            resp_group = await utils.apply(*get_cmd_group)
-            result_flags = [x.result for x in resp_group]
-            if 0 in result_flags:
-                # if not all lanes are ready in data, query again.
+    # Create metrics report generator
+    siv_metrics_report = None
+    if report_filename is not None:
+        siv_metrics_report = SIVMetricsReportGenerator(journal_filename=report_journal_filename(report_filename, "siv"))
+        siv_metrics_report.chassis = tester_obj.info.host
+
+    # SIV plots are rendered in worker processes, so data capture on the next port goes on while the earlier ports render.
+    # No worker process is started if rendering is disabled.
+    loop = asyncio.get_running_loop()
+    render_futures = []
+    with ProcessPoolExecutor(max_workers=max(1, min(len(total_port_list), os.cpu_count() or 1))) if render else contextlib.nullcontext() as executor:
+        for port_obj in total_port_list:
+            lanes, sample_buffers = await capture_siv_data(port_obj, captures, buffer_depth, logger_name, lease.settle_times)
+            if sample_buffers[0].size == 0:
+                logger.warning(f"  Port {port_obj.kind.module_id}/{port_obj.kind.port_id}: no SIV data, skipped")
                 continue
-            else:
-                for i in range(lanes_to_show):
-                    siv_raw_levels = resp_group[i].value[0:12]
-                    siv_raw_values = resp_group[i].value[12:]
-
-                    # convert from 12 raw bytes into 6 signed int
-                    siv_int_levels = []
-                    for x in zip(siv_raw_levels[0::2], siv_raw_levels[1::2]):
-                        siv_int_levels.append(int.from_bytes(bytes(x), byteorder='big', signed=True))
-                    # Please note: only the first slicer data is used here.
-
-                    # convert from 4000 bytes into 2000 signed int
-                    siv_int_values = []
-                    for x in zip(siv_raw_values[0::2], siv_raw_values[1::2]):
-                        siv_int_values.append(int.from_bytes(bytes(x), byteorder='big', signed=True))
-                    # put value data in queue
-                    data_queue[i].extend(tuple(siv_int_values))
-
-                    # Plot dots
-                    siv_subplots[i].cla()
-                    siv_subplots[i].relim()
-                    siv_subplots[i].autoscale_view()
-                    siv_subplots[i].set(xlabel=f"Value", ylabel=f"Lane {lanes[i]}")
-
-                    if should_histogram:
-                        logger.info(f"Plotting histogram")
-                        siv_subplots[i].hist(x=[*data_queue[i]], bins=128, range=(-64, 63), density=False, color="blue", orientation="horizontal")
-                    else:
-                        logger.info(f"Plotting sample points")
-                        siv_subplots[i].plot([*data_queue[i]], 'bs')
-
-
-                    # ax.plot(x3, y3, color='red', linestyle='solid', marker='D')
-
-                    # levels contains 6 values, 4 average pam4 levels and 2 slicers, (<p1> <p2> <p3> <m1> <m2> <m3>)
-                    # add base slicer (this is always at 0)
-                    y = 0
-                    siv_subplots[i].axhline(y, color='black', linestyle='-', linewidth=0.5)
-                    siv_subplots[i].text(siv_subplots[i].get_xlim()[1] + 0.1, y, f'B={y}', fontsize="small")
-                    # add upper slicer <p2>
-                    y = siv_int_levels[1]
-                    siv_subplots[i].axhline(y, color='green', linestyle='dashed', linewidth=0.5)
-                    siv_subplots[i].text(siv_subplots[i].get_xlim()[1] + 0.1, y, f'S={y}', fontsize="small")
-                    # add lower slicer <m2>
-                    y = siv_int_levels[4]
-                    siv_subplots[i].axhline(y, color='green', linestyle='dashed', linewidth=0.5)
-                    siv_subplots[i].text(siv_subplots[i].get_xlim()[1] + 0.1, y, f'S={y}', fontsize="small")
-                    # add average level 3 <p3>
-                    y = siv_int_levels[2]
-                    siv_subplots[i].axhline(y, color='black', linestyle='dashed', linewidth=0.1)
-                    siv_subplots[i].text(siv_subplots[i].get_xlim()[1] + 0.1, y, f'L3={y}', fontsize="small")
-                    # add average level 2 <p1>
-                    y = siv_int_levels[0]
-                    siv_subplots[i].axhline(y, color='black', linestyle='dashed', linewidth=0.1)
-                    siv_subplots[i].text(siv_subplots[i].get_xlim()[1] + 0.1, y, f'L2={y}', fontsize="small")
-                    # add average level 1 <m3>
-                    y = siv_int_levels[5]
-                    siv_subplots[i].axhline(y, color='black', linestyle='dashed', linewidth=0.1)
-                    siv_subplots[i].text(siv_subplots[i].get_xlim()[1] + 0.1, y, f'L1={y}', fontsize="small")
-                    # add average level 0 <m1>
-                    y = siv_int_levels[3]
-                    siv_subplots[i].axhline(y, color='black', linestyle='dashed', linewidth=0.1)
-                    siv_subplots[i].text(siv_subplots[i].get_xlim()[1] + 0.1, y, f'L0={y}', fontsize="small")
-
-                if should_histogram:
-                    filename = f"siv_hist_p{port_obj.kind.module_id}{port_obj.kind.port_id}.png"
-                    plt.savefig(os.path.join(path, filename))
-                else:
-                    filename = f"siv_sample_p{port_obj.kind.module_id}{port_obj.kind.port_id}.png"
-                    plt.savefig(os.path.join(path, filename))
-                plt.close(fig)
 
-                break
-        
-        await asyncio.sleep(3.0)
+            # PAM4 eye metrics of each lane, from the same captures as the plot
+            if siv_metrics_report is not None:
+                port_name = f"Port {port_obj.kind.module_id}/{port_obj.kind.port_id}"
+                for lane, sample_buffer in zip(lanes, sample_buffers):
+                    if not siv_slicers_valid(sample_buffer.latest_levels()):
+                        logger.warning(f"  {port_name} Lane {lane}: SIV slicers not in increasing order {sample_buffer.latest_levels().tolist()}, metrics N/A")
+                    metrics = compute_pam4_metrics(sample_buffer.ordered_samples(), sample_buffer.latest_levels())
+                    logger.info(f"  {port_name} Lane {lane}: RLM={metrics['rlm']}, SNR(dB)={metrics['snr']}, Slicer Margin={metrics['margin']}")
+                    siv_metrics_report.record_data(port_name, lane, metrics)
+
+            if should_histogram:
+                filename = f"siv_hist_p{port_obj.kind.module_id}{port_obj.kind.port_id}.png"
+            else:
+                filename = f"siv_sample_p{port_obj.kind.module_id}{port_obj.kind.port_id}.png"
+
+            # Keep the raw captures next to the plot
+            archive_filepathname = save_siv_archive(
+                os.path.join(path, filename.replace(".png", ".npz")),
+                port_obj.kind.module_id,
+                port_obj.kind.port_id,
+                lanes,
+                sample_buffers)
+            logger.info(f"  Saved {archive_filepathname}")
+
+            if not render:
+                continue
+            if should_histogram:
+                logger.info(f"Plotting histogram")
+            else:
+                logger.info(f"Plotting sample points")
+            render_futures.append(loop.run_in_executor(
+                executor,
+                render_siv_plot,
+                os.path.join(path, filename),
+                f"Port {port_obj.kind.module_id}/{port_obj.kind.port_id} Signal Integrity",
+                lanes,
+                [sample_buffer.latest_levels().tolist() for sample_buffer in sample_buffers],
+                None if should_histogram else [sample_buffer.ordered_samples() for sample_buffer in sample_buffers],
+                [sample_buffer.histogram.counts for sample_buffer in sample_buffers] if should_histogram else None))
+
+        # Wait for all plots to be saved
+        for filepathname in await asyncio.gather(*render_futures):
+            logger.info(f"  Saved {filepathname}")
+
+    if siv_metrics_report is not None:
+        siv_metrics_report.generate_report(report_filename)
 
     logger.info(f"=============== Signal Integrity - End ====================")
-
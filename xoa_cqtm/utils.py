@@ -7,13 +7,18 @@ from xoa_driver import testers
 from xoa_driver import modules
 from xoa_driver import ports
 from xoa_driver import enums
+from xoa_driver import utils
 from xoa_driver.hlfuncs import mgmt
 import logging
-from typing import List, Any
+from typing import List, Any, Dict, Tuple, Optional, Callable
 import time, os
-from .reportgen import HostTxTapReportGenerator, ModuleTxTapReportGenerator
+import math
+from statistics import NormalDist
+from decimal import Decimal
+from .reportgen import HostTxTapReportGenerator, ModuleTxTapReportGenerator, report_journal_filename
 from .enums import Cursor
 from .cmisfuncs import *
+from .readiness import SettleTimeTracker, wait_until
 
 # *************************************************************************************
 # func: get_port_list
@@ -40,26 +45,287 @@ def get_port_list(tester_obj: testers.L23Tester, port_pair_list: List[dict], key
         _port_obj_list.append(port_obj)
     return _port_obj_list
 
+# *************************************************************************************
+# class: PortOperationError
+# description: Raised when an operation fails on one or more ports in a list
+# *************************************************************************************
+class PortOperationError(Exception):
+    """Raised when an operation, e.g. reserve or release, fails on one or more ports in a list. The exception of each failing port is kept in ``errors``.
+    """
+    def __init__(self, operation: str, errors: Dict[str, BaseException]):
+        self.operation = operation
+        self.errors = errors
+        _details = ", ".join(f"{port_name}: {error!r}" for port_name, error in errors.items())
+        super().__init__(f"Failed to {operation} {len(errors)} port(s): {_details}")
+
+# *************************************************************************************
+# func: raise_port_errors
+# description: Collect exceptions returned by a batched port operation
+# *************************************************************************************
+def raise_port_errors(operation: str, port_obj_list: List[Any], results: List[Any]) -> None:
+    errors = {}
+    for _port, _result in zip(port_obj_list, results):
+        if isinstance(_result, BaseException):
+            errors[f"Port {_port.kind.module_id}/{_port.kind.port_id}"] = _result
+    if errors:
+        raise PortOperationError(operation, errors)
+
+# *************************************************************************************
+# func: wait_ports_status
+# description: Wait until all ports in the list have the expected status
+# *************************************************************************************
+async def wait_ports_status(key: str, port_obj_list: List[ports.Z800FreyaPort], get_token: Callable[[ports.Z800FreyaPort], Any], get_status: Callable[[Any], Any], expected: Any, timeout: float = 5.0, logger_name: str = "", tracker: Optional[SettleTimeTracker] = None) -> None:
+    """Poll a status of all ports in one command group until every port has the expected status.
+
+    :param key: name of the condition, used to learn its settle time
+    :type key: str
+    :param port_obj_list: ports
+    :type port_obj_list: List[ports.Z800FreyaPort]
+    :param get_token: returns the status query token of a port
+    :type get_token: Callable[[ports.Z800FreyaPort], Any]
+    :param get_status: returns the status from the response of a port
+    :type get_status: Callable[[Any], Any]
+    :param expected: expected status
+    :type expected: Any
+    :param timeout: timeout in seconds, defaults to 5.0
+    :type timeout: float, optional
+    :param logger_name: logger name, defaults to ""
+    :type logger_name: str, optional
+    :param tracker: settle time tracker of the session, defaults to None
+    :type tracker: Optional[SettleTimeTracker], optional
+    :raises PortOperationError: some ports do not have the expected status before the timeout, with the last status of each of them
+    """
+    not_ready: Dict[str, Any] = {}
+    async def _probe() -> bool:
+        resps = await utils.apply(*[get_token(_port) for _port in port_obj_list])
+        not_ready.clear()
+        for _port, resp in zip(port_obj_list, resps):
+            _status = get_status(resp)
+            if _status != expected:
+                not_ready[f"Port {_port.kind.module_id}/{_port.kind.port_id}"] = _status
+        return len(not_ready) == 0
+    if not await wait_until(key, _probe, timeout=timeout, logger_name=logger_name, tracker=tracker):
+        raise PortOperationError(f"wait for {getattr(expected, 'name', expected)} on", {port_name: TimeoutError(f"not done after {timeout}s, status {getattr(status, 'name', status)}") for port_name, status in not_ready.items()})
+
+# *************************************************************************************
+# func: wait_ports_in_sync
+# description: Wait until all ports in the list are in sync with their peers
+# *************************************************************************************
+async def wait_ports_in_sync(port_obj_list: List[ports.Z800FreyaPort], timeout: float = 5.0, logger_name: str = "", tracker: Optional[SettleTimeTracker] = None) -> None:
+    await wait_ports_status("port_sync", port_obj_list, lambda _port: _port.sync_status.get(), lambda resp: resp.sync_status, enums.SyncStatus.IN_SYNC, timeout, logger_name, tracker)
+
+# *************************************************************************************
+# func: wait_ports_reservation
+# description: Wait until all ports in the list have the expected reservation status
+# *************************************************************************************
+async def wait_ports_reservation(port_obj_list: List[ports.Z800FreyaPort], status: enums.ReservedStatus, timeout: float = 5.0, logger_name: str = "", tracker: Optional[SettleTimeTracker] = None) -> None:
+    await wait_ports_status(f"port_reservation_{status.name.lower()}", port_obj_list, lambda _port: _port.reservation.get(), lambda resp: resp.status, status, timeout, logger_name, tracker)
+
+# *************************************************************************************
+# func: wait_traffic_stopped
+# description: Wait until traffic is stopped on all ports in the list
+# *************************************************************************************
+async def wait_traffic_stopped(port_obj_list: List[ports.Z800FreyaPort], timeout: float = 5.0, logger_name: str = "", tracker: Optional[SettleTimeTracker] = None) -> None:
+    await wait_ports_status("traffic_stop", port_obj_list, lambda _port: _port.traffic.state.get(), lambda resp: resp.on_off, enums.TrafficOnOff.OFF, timeout, logger_name, tracker)
+
 # *************************************************************************************
 # func: reserve_reset_ports_in_list
-# description: Reserve and reset ports in the list
+# description: Reserve and reset ports in the list. All ports are handled concurrently,
+# and the modules are released once no matter how many ports are on them.
 # *************************************************************************************
-async def reserve_reset_ports_in_list(tester_obj: testers.L23Tester, port_obj_list: List[ports.Z800FreyaPort]) -> None:
-    for _port in port_obj_list:
-        _module_id = _port.kind.module_id
-        _module = tester_obj.modules.obtain(_module_id)
-        await mgmt.release_module(module=_module, should_release_ports=False)
-        await mgmt.reserve_port(_port, reset=True)
-    await asyncio.sleep(1.0)
+async def reserve_reset_ports_in_list(tester_obj: testers.L23Tester, port_obj_list: List[ports.Z800FreyaPort], reset: bool = True, logger_name: str = "", tracker: Optional[SettleTimeTracker] = None) -> None:
+    _module_ids = sorted(set(_port.kind.module_id for _port in port_obj_list))
+    _module_list = [tester_obj.modules.obtain(_module_id) for _module_id in _module_ids]
+    await asyncio.gather(*[mgmt.release_module(module=_module, should_release_ports=False) for _module in _module_list])
+    results = await asyncio.gather(*[mgmt.reserve_port(_port, reset=reset) for _port in port_obj_list], return_exceptions=True)
+    raise_port_errors("reserve", port_obj_list, results)
+    await wait_ports_reservation(port_obj_list, enums.ReservedStatus.RESERVED_BY_YOU, logger_name=logger_name, tracker=tracker)
+    if reset:
+        await wait_ports_in_sync(port_obj_list, logger_name=logger_name, tracker=tracker)
 
 # *************************************************************************************
-# func: release_ports_in_list
-# description: Release ports in the list
+# func: reset_ports_in_list
+# description: Reset ports in the list using one command group
+# *************************************************************************************
+async def reset_ports_in_list(port_obj_list: List[ports.Z800FreyaPort], logger_name: str = "", tracker: Optional[SettleTimeTracker] = None) -> None:
+    results = await utils.apply(*[_port.reset.set() for _port in port_obj_list], return_exceptions=True)
+    raise_port_errors("reset", port_obj_list, results)
+    await wait_ports_in_sync(port_obj_list, logger_name=logger_name, tracker=tracker)
+
 # *************************************************************************************
-async def release_ports_in_list(port_obj_list: List[ports.Z800FreyaPort]) -> None:
-    for _port in port_obj_list:
-        await mgmt.release_port(_port)
-    await asyncio.sleep(1.0)
+# func: release_ports_in_list
+# description: Release ports in the list. All ports are handled concurrently.
+# *************************************************************************************
+async def release_ports_in_list(port_obj_list: List[ports.Z800FreyaPort], logger_name: str = "", tracker: Optional[SettleTimeTracker] = None) -> None:
+    results = await asyncio.gather(*[mgmt.release_port(_port) for _port in port_obj_list], return_exceptions=True)
+    raise_port_errors("release", port_obj_list, results)
+    await wait_ports_reservation(port_obj_list, enums.ReservedStatus.RELEASED, logger_name=logger_name, tracker=tracker)
+
+# *************************************************************************************
+# class: PortLeaseManager
+# description: Keep the test ports reserved for the whole test session
+# *************************************************************************************
+class PortLeaseManager:
+    """Keep the test ports reserved for the whole test session. Ports are reserved the first time a subtest asks for them, reset only when a subtest needs a clean port, and released all together at the end of the session.
+
+    The session also owns the cache of the static CMIS memory of the transceivers (``cmis_cache``) and the learned settle times of the readiness conditions (``settle_times``). The cache survives between subtests. It is only dropped for the ports that are reset and for the modules whose media is changed, see :func:`change_module_media`.
+    """
+    def __init__(self, tester_obj: testers.L23Tester, logger_name: str = ""):
+        self.tester_obj = tester_obj
+        self.logger_name = logger_name
+        self.leased_ports: Dict[Tuple[int, int], ports.Z800FreyaPort] = {}
+        self.cmis_cache = CMISPageCache()
+        self.settle_times = SettleTimeTracker()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, port_obj_list: List[ports.Z800FreyaPort], reset: bool = False) -> None:
+        """Make sure the ports are reserved. Ports that are already leased are not reserved again.
+
+        :param port_obj_list: ports needed by the subtest
+        :type port_obj_list: List[ports.Z800FreyaPort]
+        :param reset: reset the ports to give the subtest a clean port configuration, defaults to False
+        :type reset: bool, optional
+        :raises PortOperationError: some ports can not be reserved or reset, or do not get in sync after the reset
+        """
+        _unique_ports: Dict[Tuple[int, int], ports.Z800FreyaPort] = {}
+        for _port in port_obj_list:
+            _unique_ports[(_port.kind.module_id, _port.kind.port_id)] = _port
+        async with self._lock:
+            _new_ports = [_port for _key, _port in _unique_ports.items() if _key not in self.leased_ports]
+            if _new_ports:
+                await reserve_reset_ports_in_list(self.tester_obj, _new_ports, reset=False, logger_name=self.logger_name, tracker=self.settle_times)
+                for _port in _new_ports:
+                    self.leased_ports[(_port.kind.module_id, _port.kind.port_id)] = _port
+            if reset:
+                self.cmis_cache.invalidate(list(_unique_ports.values()))
+                await reset_ports_in_list(list(_unique_ports.values()), logger_name=self.logger_name, tracker=self.settle_times)
+
+    async def release_all(self) -> None:
+        """Release all the leased ports, e.g. before changing the module media or at the end of the session.
+        """
+        async with self._lock:
+            if self.leased_ports:
+                await release_ports_in_list(list(self.leased_ports.values()), logger_name=self.logger_name, tracker=self.settle_times)
+            self.leased_ports.clear()
+
+# *************************************************************************************
+# class: ThroughputSearch
+# description: RFC 2544 binary search of the zero-loss rate of a port pair
+# *************************************************************************************
+class ThroughputSearch:
+    """RFC 2544 binary search of the zero-loss rate of a port pair, between the start rate and the end rate.
+
+    The first trial runs at the end rate, and the search stops right away if it has no loss. Otherwise the rate is bisected between the highest passing and the lowest failing rate until they are no more than ``resolution`` apart. If no rate passes, the start rate is tried once before giving up.
+    """
+    def __init__(self, start_rate: Decimal, end_rate: Decimal, resolution: Decimal):
+        assert resolution > 0
+        self.start_rate = start_rate
+        self.end_rate = end_rate
+        self.resolution = resolution
+        self.lower = start_rate
+        self.upper = end_rate
+        self.next_rate = end_rate
+        self.best_result: Optional[dict] = None
+        self.trials = 0
+        self.done = False
+
+    def update(self, passed: bool, result: dict) -> None:
+        """Update the search with the outcome of a trial at ``next_rate``.
+
+        :param passed: True if the trial had no frame loss
+        :type passed: bool
+        :param result: measured result of the trial
+        :type result: dict
+        """
+        self.trials += 1
+        rate = self.next_rate
+        if passed:
+            self.best_result = result
+            self.lower = rate
+            if rate == self.end_rate:
+                self.done = True
+                return
+        else:
+            self.upper = rate
+            if rate <= self.start_rate:
+                self.done = True
+                return
+        if self.upper - self.lower <= self.resolution:
+            if self.best_result is None:
+                self.next_rate = self.start_rate
+            else:
+                self.done = True
+            return
+        self.next_rate = (self.lower + self.upper) / 2
+
+# *************************************************************************************
+# func: poisson_mean_bound
+# description: Confidence bound of the mean of a Poisson distribution
+# *************************************************************************************
+def poisson_mean_bound(count: int, confidence: float, upper: bool) -> float:
+    """One-sided confidence bound of the mean of a Poisson distribution, given an observed count. This is the exact (Garwood) bound, e.g. the upper bound is 4.6 for 0 count at 99% confidence. Large counts use the Wilson-Hilferty approximation of the chi-square quantile.
+
+    :param count: observed count
+    :type count: int
+    :param confidence: confidence level, e.g. 0.99
+    :type confidence: float
+    :param upper: True for the upper bound, False for the lower bound
+    :type upper: bool
+    :return: the bound of the mean
+    :rtype: float
+    """
+    assert 0 < confidence < 1
+    if count == 0:
+        return -math.log(1 - confidence) if upper else 0.0
+    if count > 100:
+        # chi2.ppf(p, v)/2, with v = 2(count+1) for the upper bound and v = 2count for the lower bound
+        v = 2*(count + 1) if upper else 2*count
+        z = NormalDist().inv_cdf(confidence if upper else 1 - confidence)
+        return v*(1 - 2/(9*v) + z*math.sqrt(2/(9*v)))**3/2
+
+    def _cdf(k: int, mean: float) -> float:
+        if mean == 0:
+            return 1.0
+        return sum(math.exp(i*math.log(mean) - mean - math.lgamma(i + 1)) for i in range(k + 1))
+
+    # upper: P(X <= count) = 1 - confidence, lower: P(X >= count) = 1 - confidence. The CDF decreases with the mean.
+    k, target = (count, 1 - confidence) if upper else (count - 1, confidence)
+    lo, hi = 0.0, count + 10*math.sqrt(count + 1) + 10
+    while _cdf(k, hi) > target:
+        hi *= 2
+    for _ in range(100):
+        mid = (lo + hi)/2
+        if _cdf(k, mid) > target:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi)/2
+
+# *************************************************************************************
+# func: ber_target_verdict
+# description: Decide if a lane meets a target BER at a confidence level
+# *************************************************************************************
+def ber_target_verdict(bits: int, errors: int, target_ber: float, confidence: float) -> Optional[str]:
+    """Decide if a lane meets a target BER at a confidence level.
+
+    :param bits: number of received bits
+    :type bits: int
+    :param errors: number of bit errors
+    :type errors: int
+    :param target_ber: target BER
+    :type target_ber: float
+    :param confidence: confidence level, e.g. 0.99
+    :type confidence: float
+    :return: "pass" if the upper bound of the BER is not above the target, "fail" if the lower bound is above the target, None if it is not decided yet
+    :rtype: Optional[str]
+    """
+    if bits <= 0:
+        return None
+    if poisson_mean_bound(errors, confidence, upper=True)/bits <= target_ber:
+        return "pass"
+    if poisson_mean_bound(errors, confidence, upper=False)/bits > target_ber:
+        return "fail"
+    return None
 
 # *************************************************************************************
 # func: calc_fec_ber
@@ -130,16 +396,12 @@ def hex_to_filtered_ascii(hex_str) -> str:
 # func: get_tcvr_vendor_name
 # description: Get transceiver vendor name
 # *************************************************************************************
-async def get_tcvr_vendor_name(port_obj: ports.Z800FreyaPort) -> dict:
+async def get_tcvr_vendor_name(port_obj: ports.Z800FreyaPort, cache: Optional[CMISPageCache] = None) -> dict:
     description = "Vendor Name"
     page_address = 0x00
     byte_address = 129
     length = 16
-    resp = await port_obj.transceiver.access_rw_seq(
-        page_address=page_address,
-        register_address=byte_address,
-        byte_count=length).get()
-    _raw_value = resp.value
+    _raw_value = await read_cmis_memory(port_obj, page_address, byte_address, length, cache)
     _acsii_value = hex_to_ascii(_raw_value)
     _hex_value = beautify_hex(_raw_value)
     _filtered_acsii_value = hex_to_filtered_ascii(_raw_value)
@@ -155,16 +417,12 @@ async def get_tcvr_vendor_name(port_obj: ports.Z800FreyaPort) -> dict:
 # func: get_tcvr_vendor_pn
 # description: Get transceiver vendor part number
 # *************************************************************************************
-async def get_tcvr_vendor_pn(port_obj: ports.Z800FreyaPort) -> dict:
+async def get_tcvr_vendor_pn(port_obj: ports.Z800FreyaPort, cache: Optional[CMISPageCache] = None) -> dict:
     description = "Vendor P/N"
     page_address = 0x00
     byte_address = 148
     length = 16
-    resp = await port_obj.transceiver.access_rw_seq(
-        page_address=page_address,
-        register_address=byte_address,
-        byte_count=length).get()
-    _raw_value = resp.value
+    _raw_value = await read_cmis_memory(port_obj, page_address, byte_address, length, cache)
     _acsii_value = hex_to_ascii(_raw_value)
     _hex_value = beautify_hex(_raw_value)
     _filtered_acsii_value = hex_to_filtered_ascii(_raw_value)
@@ -180,16 +438,12 @@ async def get_tcvr_vendor_pn(port_obj: ports.Z800FreyaPort) -> dict:
 # func: get_tcvr_vendor_sn
 # description: Get transceiver vendor serial number
 # *************************************************************************************
-async def get_tcvr_vendor_sn(port_obj: ports.Z800FreyaPort) -> dict:
+async def get_tcvr_vendor_sn(port_obj: ports.Z800FreyaPort, cache: Optional[CMISPageCache] = None) -> dict:
     description = "Vendor S/N"
     page_address = 0x00
     byte_address = 166
     length = 16
-    resp = await port_obj.transceiver.access_rw_seq(
-        page_address=page_address,
-        register_address=byte_address,
-        byte_count=length).get()
-    _raw_value = resp.value
+    _raw_value = await read_cmis_memory(port_obj, page_address, byte_address, length, cache)
     _acsii_value = hex_to_ascii(_raw_value)
     _hex_value = beautify_hex(_raw_value)
     _filtered_acsii_value = hex_to_filtered_ascii(_raw_value)
@@ -205,7 +459,7 @@ async def get_tcvr_vendor_sn(port_obj: ports.Z800FreyaPort) -> dict:
 # func: get_tcvr_cable_length
 # description: Get transceiver cable length
 # *************************************************************************************
-async def get_tcvr_cable_length(port_obj: ports.Z800FreyaPort) -> dict:
+async def get_tcvr_cable_length(port_obj: ports.Z800FreyaPort, cache: Optional[CMISPageCache] = None) -> dict:
     description = "Cable Length"
     page_address = 0x00
     byte_address = 202
@@ -216,11 +470,7 @@ async def get_tcvr_cable_length(port_obj: ports.Z800FreyaPort) -> dict:
         "2" : 10,
         "3" : 100
     }
-    resp = await port_obj.transceiver.access_rw_seq(
-        page_address=page_address,
-        register_address=byte_address,
-        byte_count=length).get()
-    _raw_value = resp.value
+    _raw_value = await read_cmis_memory(port_obj, page_address, byte_address, length, cache)
     _hex_value = beautify_hex(_raw_value)
     _length_multiplier = length_multiplier_decoder[str(int(_raw_value, 16) >> 6)]
     _base_length = int(_raw_value, 16) & 0x3F
@@ -236,13 +486,13 @@ async def get_tcvr_cable_length(port_obj: ports.Z800FreyaPort) -> dict:
 # func: create_report_dir
 # description: Create report directory
 # *************************************************************************************
-async def create_report_dir(tester_obj: testers.L23Tester, port_pair_list: List[dict]) -> str:
+async def create_report_dir(tester_obj: testers.L23Tester, port_pair_list: List[dict], cache: Optional[CMISPageCache] = None) -> str:
     tx_port_list: List[ports.Z800FreyaPort] = get_port_list(tester_obj, port_pair_list, "tx")
     port_obj = tx_port_list[0]
     # read vendor name and pn but only keep the good characters
-    tmp = await get_tcvr_vendor_name(port_obj)
+    tmp = await get_tcvr_vendor_name(port_obj, cache)
     filtered_vendor_name = tmp["filtered_acsii_value"]
-    tmp = await get_tcvr_vendor_pn(port_obj)
+    tmp = await get_tcvr_vendor_pn(port_obj, cache)
     filtered_vendor_pn = tmp["filtered_acsii_value"]
     datetime = time.strftime("%Y%m%d_%H%M%S", time.localtime())
     path = filtered_vendor_name + "_" + filtered_vendor_pn + "_" + datetime
@@ -254,7 +504,7 @@ async def create_report_dir(tester_obj: testers.L23Tester, port_pair_list: List[
 # func: change_module_media
 # description: Change module media and port speed
 # *************************************************************************************
-async def change_module_media(tester_obj: testers.L23Tester, module_list: List[int], media: enums.MediaConfigurationType, port_speed: str, logger_name: str) -> None:
+async def change_module_media(tester_obj: testers.L23Tester, module_list: List[int], media: enums.MediaConfigurationType, port_speed: str, logger_name: str, cache: Optional[CMISPageCache] = None) -> None:
 
     # Get logger
     logger = logging.getLogger(logger_name)
@@ -272,6 +522,9 @@ async def change_module_media(tester_obj: testers.L23Tester, module_list: List[i
         _module = tester_obj.modules.obtain(_module_id)
         await mgmt.set_module_media_config(module=_module, media=media)
         await mgmt.set_module_port_config(module=_module, port_speed=_port_speed, port_count=_port_count)
+        # the transceivers of the module are re-initialized, and its ports are re-numbered
+        if cache is not None:
+            cache.invalidate_module(_module_id)
 
     logger.info(f"=============== Done ====================")
 
@@ -282,7 +535,7 @@ async def change_module_media(tester_obj: testers.L23Tester, module_list: List[i
 async def read_host_tx_eq(tester_obj: testers.L23Tester, port_pair_list: List[dict], report_filename: str, logger_name: str) -> None:
 
     # Init report generator
-    report_gen = HostTxTapReportGenerator()
+    report_gen = HostTxTapReportGenerator(journal_filename=report_journal_filename(report_filename, "host_tx_eq"))
     report_gen.chassis = tester_obj.info.host
 
     # Get logger
@@ -312,7 +565,7 @@ async def read_host_tx_eq(tester_obj: testers.L23Tester, port_pair_list: List[di
 # func: load_host_tx_eq
 # description: Load host-side TX equalization settings
 # *************************************************************************************
-async def load_host_tx_eq(tester_obj: testers.L23Tester, port_pair_list: List[dict], logger_name: str, host_tx_eq: dict) -> None:
+async def load_host_tx_eq(tester_obj: testers.L23Tester, port_pair_list: List[dict], logger_name: str, host_tx_eq: dict, port_lease: Optional[PortLeaseManager] = None) -> None:
     
     # Get logger
     logger = logging.getLogger(logger_name)
@@ -324,8 +577,8 @@ async def load_host_tx_eq(tester_obj: testers.L23Tester, port_pair_list: List[di
     if host_tx_eq['enable']:
         tx_port_list: List[ports.Z800FreyaPort] = get_port_list(tester_obj, port_pair_list, "tx")
         rx_port_list: List[ports.Z800FreyaPort] = get_port_list(tester_obj, port_pair_list, "rx")
-        await reserve_reset_ports_in_list(tester_obj, tx_port_list)
-        await reserve_reset_ports_in_list(tester_obj, rx_port_list)
+        lease = port_lease or PortLeaseManager(tester_obj, logger_name)
+        await lease.acquire(tx_port_list + rx_port_list)
         pre3 = host_tx_eq["pre3"]
         pre2 = host_tx_eq["pre2"]
         pre = host_tx_eq["pre"]
@@ -337,13 +590,60 @@ async def load_host_tx_eq(tester_obj: testers.L23Tester, port_pair_list: List[di
             for i in range(serdes_cnt):
                 await tx_port_obj.l1.serdes[i].medium.tx.native.set(pre3, pre2, pre, main, post)
                 await rx_port_obj.l1.serdes[i].medium.tx.native.set(pre3, pre2, pre, main, post)
-        await asyncio.sleep(1.0)
+
+# *************************************************************************************
+# func: provision_module_tx_eq
+# description: Provision module-side TX equalization settings of a port
+# *************************************************************************************
+async def provision_module_tx_eq(port_obj: ports.Z800FreyaPort, pre: int, main: int, post: int, logger_name: str, timeout: float = 10.0, cache: Optional[CMISPageCache] = None) -> dict:
+    """Provision the module-side TX equalization settings of a port, and wait for the ConfigStatus of its lanes.
+
+    :param port_obj: port object
+    :type port_obj: ports.Z800FreyaPort
+    :param pre: pre-cursor in dB
+    :type pre: int
+    :param main: amplitude
+    :type main: int
+    :param post: post-cursor in dB
+    :type post: int
+    :param logger_name: logger name
+    :type logger_name: str
+    :param timeout: ConfigStatus deadline in seconds, defaults to 10.0
+    :type timeout: float, optional
+    :param cache: CMIS page cache of the session, defaults to None
+    :type cache: Optional[CMISPageCache], optional
+    :return: outcome of the port, ``{"port": "Port m/p", "result": "success" | "failed" | "timeout" | "unconfirmed" | "unsupported", "lanes": {lane: ConfigStatus name}}``
+    :rtype: dict
+    """
+    logger = logging.getLogger(logger_name)
+    port_name = f"Port {port_obj.kind.module_id}/{port_obj.kind.port_id}"
+    if not await hot_reconfiguration_supported(port_obj, logger_name, cache):
+        logger.warning(f"Hot Reconfiguration is not supported on {port_name}")
+        return {"port": port_name, "result": "unsupported", "lanes": {}}
+
+    # Stage the EQ settings, and commit them with the Provision-and-Commission trigger
+    txn = CMISTransaction(port_obj, logger_name)
+    txn.output_eq_write_all(pre, Cursor.Precursor)
+    txn.output_eq_write_all(main, Cursor.Amplitude)
+    txn.output_eq_write_all(post, Cursor.Postcursor)
+    await txn.commit()
+
+    # Read ConfigStatus register to check if the EQ settings are applied.
+    config_status_list = await txn.wait_config_status(timeout=timeout)
+    if not txn.config_completed:
+        # still in progress, or the lanes kept the status of an earlier commit and the Active Control Set does not hold the new settings
+        result = "timeout" if ConfigStatus.ConfigInProgress in config_status_list else "unconfirmed"
+    elif len(set(config_status_list)) == 1 and ConfigStatus.ConfigSuccess in config_status_list:
+        result = "success"
+    else:
+        result = "failed"
+    return {"port": port_name, "result": result, "lanes": {i+1: x.name for i, x in enumerate(config_status_list)}}
 
 # *************************************************************************************
 # func: load_module_tx_eq
-# description: Load host-side TX equalization settings
+# description: Load module-side TX equalization settings
 # *************************************************************************************
-async def load_module_tx_eq(tester_obj: testers.L23Tester, port_pair_list: List[dict], logger_name: str, module_tx_eq: dict):
+async def load_module_tx_eq(tester_obj: testers.L23Tester, port_pair_list: List[dict], logger_name: str, module_tx_eq: dict, port_lease: Optional[PortLeaseManager] = None) -> List[dict]:
     
     # Get logger
     logger = logging.getLogger(logger_name)
@@ -352,49 +652,29 @@ async def load_module_tx_eq(tester_obj: testers.L23Tester, port_pair_list: List[
     logger.info(f"{'Username:':<20}{tester_obj.session.owner_name}")
     logger.info(f"{'Enabled:':<20}{module_tx_eq['enable']}")
 
+    outcomes = []
     if module_tx_eq['enable']:
         tx_port_list: List[ports.Z800FreyaPort] = get_port_list(tester_obj, port_pair_list, "tx")
         rx_port_list: List[ports.Z800FreyaPort] = get_port_list(tester_obj, port_pair_list, "rx")
-        await reserve_reset_ports_in_list(tester_obj, tx_port_list)
-        await reserve_reset_ports_in_list(tester_obj, rx_port_list)
+        lease = port_lease or PortLeaseManager(tester_obj, logger_name)
+        await lease.acquire(tx_port_list + rx_port_list)
         pre = module_tx_eq["pre"]
         main = module_tx_eq["main"]
         post = module_tx_eq["post"]
-        for tx_port_obj, rx_port_obj in zip(tx_port_list, rx_port_list):
-            hotreconfig_supported = await hot_reconfiguration_supported(tx_port_obj, logger_name)
-            if not hotreconfig_supported:
-                logger.warning(f"Hot Reconfiguration is not supported on Port {tx_port_obj.kind.module_id}/{tx_port_obj.kind.port_id}")
-                return
-            hotreconfig_supported = await hot_reconfiguration_supported(rx_port_obj, logger_name)
-            if not hotreconfig_supported:
-                logger.warning(f"Hot Reconfiguration is not supported on Port {rx_port_obj.kind.module_id}/{rx_port_obj.kind.port_id}")
-                return
-
-            await output_eq_write_all(tx_port_obj, pre, Cursor.Precursor, logger_name)
-            await output_eq_write_all(tx_port_obj, main, Cursor.Amplitude, logger_name)
-            await output_eq_write_all(tx_port_obj, post, Cursor.Postcursor, logger_name)
-
-            await output_eq_write_all(rx_port_obj, pre, Cursor.Precursor, logger_name)
-            await output_eq_write_all(rx_port_obj, main, Cursor.Amplitude, logger_name)
-            await output_eq_write_all(rx_port_obj, post, Cursor.Postcursor, logger_name)
-
-            # Trigger the Provision-and-Commission procedure
-            await trigger_provision_commission(port=tx_port_obj, logger_name=logger_name)
-            await trigger_provision_commission(port=rx_port_obj, logger_name=logger_name)
 
-            # Read ConfigStatus register to check if the EQ settings are applied.
-            while True:
-                config_status_list = await read_config_status_all(port=tx_port_obj, logger_name=logger_name)
-                if ConfigStatus.ConfigInProgress in config_status_list:
-                    logger.info(f"  ConfigStatus is still ConfigInProgress. Please wait for the configuration to complete.")
-                    await asyncio.sleep(1)
-                    continue
-                elif len(set(config_status_list)) == 1 and ConfigStatus.ConfigSuccess in config_status_list:
-                    logger.info(f"  Write operation successful")
-                    return
-                else:
-                    logger.info(f"  Write operation failed. ({config_status_list})")
-                    return
+        # Provision all ports of all pairs concurrently, each port once
+        total_port_list = list(dict.fromkeys(tx_port_list + rx_port_list))
+        outcomes = list(await asyncio.gather(*[provision_module_tx_eq(port_obj, pre, main, post, logger_name, cache=lease.cmis_cache) for port_obj in total_port_list]))
+        for outcome in outcomes:
+            if outcome["result"] == "success":
+                logger.info(f"{outcome['port']}: Write operation successful")
+            elif outcome["result"] == "timeout":
+                logger.warning(f"{outcome['port']}: ConfigStatus not final before the timeout. ({outcome['lanes']})")
+            elif outcome["result"] == "unconfirmed":
+                logger.warning(f"{outcome['port']}: ConfigStatus not updated since the trigger and settings not active, write operation not confirmed. ({outcome['lanes']})")
+            elif outcome["result"] == "failed":
+                logger.warning(f"{outcome['port']}: Write operation failed. ({outcome['lanes']})")
+    return outcomes
 
 
 # *************************************************************************************
@@ -404,7 +684,7 @@ async def load_module_tx_eq(tester_obj: testers.L23Tester, port_pair_list: List[
 async def read_module_tx_eq(tester_obj: testers.L23Tester, port_pair_list: List[dict], report_filename: str, logger_name: str) -> None:
 
     # Init report generator
-    report_gen = ModuleTxTapReportGenerator()
+    report_gen = ModuleTxTapReportGenerator(journal_filename=report_journal_filename(report_filename, "module_tx_eq"))
     report_gen.chassis = tester_obj.info.host
 
     # Get logger
@@ -414,10 +694,12 @@ async def read_module_tx_eq(tester_obj: testers.L23Tester, port_pair_list: List[
     logger.info(f"{'Username:':<20}{tester_obj.session.owner_name}")
 
     rx_port_list: List[ports.Z800FreyaPort] = get_port_list(tester_obj, port_pair_list, "rx")
-    for rx_port_obj in rx_port_list:
-        pre_db_list = await output_eq_read_all(rx_port_obj, Cursor.Precursor, logger_name)
-        main_db_list = await output_eq_read_all(rx_port_obj, Cursor.Amplitude, logger_name)
-        post_db_list = await output_eq_read_all(rx_port_obj, Cursor.Postcursor, logger_name)
+    # the 3 cursors are read together, and all ports concurrently
+    _eq_fields = [OUTPUT_EQ_FIELDS[Cursor.Precursor], OUTPUT_EQ_FIELDS[Cursor.Amplitude], OUTPUT_EQ_FIELDS[Cursor.Postcursor]]
+    fields_list = await read_cmis_fields_all(rx_port_list, _eq_fields)
+    for rx_port_obj, fields in zip(rx_port_list, fields_list):
+        logger.info(f"Port {rx_port_obj.kind.module_id}/{rx_port_obj.kind.port_id}: Read module TX EQ")
+        pre_db_list, main_db_list, post_db_list = [fields[_name] for _name in _eq_fields]
         for i, (pre_db, main_db, post_db) in enumerate(zip(pre_db_list, main_db_list, post_db_list)):
             logger.info(f"Lane {i}: pre = {pre_db}dB, main = {main_db}mV, post = {post_db}dB")
             report_gen.record_data(port_name=f"Port {rx_port_obj.kind.module_id}/{rx_port_obj.kind.port_id}", lane=i, pre_db=pre_db, main_db=main_db, post_db=post_db)